@@ -4,11 +4,9 @@ SQLAlchemy models for DayZ HiveAPI.
 This module defines the database schema using SQLAlchemy ORM.
 """
 
-import uuid
-from datetime import datetime
 from typing import Dict, Any, Optional
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Index, Text
+from sqlalchemy import BigInteger, Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Index, PrimaryKeyConstraint, Sequence, Text, UniqueConstraint, desc, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -16,21 +14,17 @@ from sqlalchemy.orm import relationship
 # Create Base class for models
 Base = declarative_base()
 
-def generate_uuid():
-    """Generate a UUID string for use as a primary key."""
-    return str(uuid.uuid4())
-
 class Tenant(Base):
     """Tenant model for multi-tenant support."""
     
     __tablename__ = "tenants"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     name = Column(String, nullable=False)
     owner_id = Column(String, nullable=False)
     settings_json = Column(JSONB, nullable=False, default=dict)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     clusters = relationship("Cluster", back_populates="tenant", cascade="all, delete-orphan")
@@ -45,12 +39,12 @@ class Cluster(Base):
     
     __tablename__ = "clusters"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    tenant_id = Column(String, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     policy_json = Column(JSONB, nullable=False, default=dict)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     tenant = relationship("Tenant", back_populates="clusters")
@@ -67,14 +61,14 @@ class Server(Base):
     
     __tablename__ = "servers"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    cluster_id = Column(String, ForeignKey("clusters.id", ondelete="CASCADE"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    cluster_id = Column(UUID(as_uuid=True), ForeignKey("clusters.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     host_fingerprint = Column(String, nullable=False, unique=True)
     public_key_pem = Column(Text, nullable=False)
     status = Column(String, nullable=False, default="inactive")
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    last_seen_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     cluster = relationship("Cluster", back_populates="servers")
@@ -93,12 +87,12 @@ class Player(Base):
     
     __tablename__ = "players"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     platform_uid = Column(String, nullable=False, unique=True)
     reputation = Column(Integer, nullable=False, default=0)
     meta = Column(JSONB, nullable=False, default=dict)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    last_seen_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     characters = relationship("Character", back_populates="player", cascade="all, delete-orphan")
@@ -113,17 +107,17 @@ class Character(Base):
     
     __tablename__ = "characters"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    player_id = Column(String, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
-    cluster_id = Column(String, ForeignKey("clusters.id", ondelete="CASCADE"), nullable=False)
-    owned_by_server = Column(String, ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    player_id = Column(UUID(as_uuid=True), ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    cluster_id = Column(UUID(as_uuid=True), ForeignKey("clusters.id", ondelete="CASCADE"), nullable=False)
+    owned_by_server = Column(UUID(as_uuid=True), ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
     life_state = Column(String, nullable=False, default="alive")
     position = Column(JSONB, nullable=True)
     stats_json = Column(JSONB, nullable=False, default=dict)
     inventory_json = Column(JSONB, nullable=True)
     inventory_checksum = Column(String, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    last_seen_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     player = relationship("Player", back_populates="characters")
@@ -136,6 +130,10 @@ class Character(Base):
         Index("ix_characters_cluster_id", "cluster_id"),
         Index("ix_characters_owned_by_server", "owned_by_server"),
         Index("ix_characters_life_state", "life_state"),
+        Index(
+            "uq_characters_alive", "player_id", "cluster_id",
+            unique=True, postgresql_where=text("life_state = 'alive'")
+        ),
     )
 
 class Event(Base):
@@ -143,23 +141,27 @@ class Event(Base):
     
     __tablename__ = "events"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    # Monotonic cursor for keyset pagination (id stays the external handle)
+    seq = Column(BigInteger, Sequence("events_seq"), nullable=False)
     type = Column(String, nullable=False)
     actor = Column(String, nullable=True)
     object_id = Column(String, nullable=True)
-    server_id = Column(String, ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
+    server_id = Column(UUID(as_uuid=True), ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
     payload_json = Column(JSONB, nullable=False, default=dict)
-    ts = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ts = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     
     # Relationships
     server = relationship("Server", back_populates="events")
     
-    # Indices
+    # Indices (composites match the filter + ORDER BY ts DESC access pattern)
     __table_args__ = (
-        Index("ix_events_type", "type"),
-        Index("ix_events_object_id", "object_id"),
-        Index("ix_events_server_id", "server_id"),
-        Index("ix_events_ts", "ts"),
+        Index("ix_events_server_ts", "server_id", "ts"),
+        Index("ix_events_type_ts", "type", "ts"),
+        Index("ix_events_object_ts", "object_id", "ts"),
+        Index("ix_events_ts_brin", "ts", postgresql_using="brin"),
+        Index("ix_events_ts_seq", desc("ts"), desc("seq")),
+        UniqueConstraint("seq", name="uq_events_seq"),
     )
 
 class IdempotencyKey(Base):
@@ -167,14 +169,16 @@ class IdempotencyKey(Base):
     
     __tablename__ = "idempotency_keys"
     
-    key = Column(String, primary_key=True)
-    server_id = Column(String, ForeignKey("servers.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    key = Column(String, nullable=False)
+    server_id = Column(UUID(as_uuid=True), ForeignKey("servers.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     
-    # Indices
+    # Indices (the primary key covers every column, so lookups by key are
+    # index-only scans)
     __table_args__ = (
+        PrimaryKeyConstraint("key", name="idempotency_keys_pkey", postgresql_include=["server_id", "created_at"]),
         Index("ix_idempotency_keys_server_id", "server_id"),
-        Index("ix_idempotency_keys_created_at", "created_at"),
+        Index("ix_idempotency_keys_created_at_brin", "created_at", postgresql_using="brin"),
     )
 
 class MoveTicket(Base):
@@ -182,20 +186,20 @@ class MoveTicket(Base):
     
     __tablename__ = "move_tickets"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    character_id = Column(String, ForeignKey("characters.id", ondelete="CASCADE"), nullable=False)
-    source_server_id = Column(String, ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
-    target_server_id = Column(String, ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    character_id = Column(UUID(as_uuid=True), ForeignKey("characters.id", ondelete="CASCADE"), nullable=False)
+    source_server_id = Column(UUID(as_uuid=True), ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
+    target_server_id = Column(UUID(as_uuid=True), ForeignKey("servers.id", ondelete="SET NULL"), nullable=True)
     status = Column(String, nullable=False, default="issued")
-    expires_at = Column(DateTime, nullable=False)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    redeemed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    redeemed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Indices
     __table_args__ = (
         Index("ix_move_tickets_character_id", "character_id"),
         Index("ix_move_tickets_source_server_id", "source_server_id"),
         Index("ix_move_tickets_target_server_id", "target_server_id"),
-        Index("ix_move_tickets_status", "status"),
+        Index("ix_move_tickets_active", "character_id", postgresql_where=text("status = 'issued'")),
         Index("ix_move_tickets_expires_at", "expires_at"),
     )
@@ -4,11 +4,16 @@ Dependency injection for DayZ HiveAPI.
 This module provides dependency injection functions for database and Redis connections.
 """
 
+import json
 import logging
-from typing import Generator, AsyncGenerator
+import re
+from typing import AsyncGenerator, Union
+
+import orjson
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from redis.asyncio import Redis, from_url
 
 from .config import settings
@@ -16,53 +21,117 @@ from .config import settings
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Create SQLAlchemy engine
+# A run of this many digits may be an integer wider than 64 bits, which
+# orjson would decode as a float
+_WIDE_INTEGER = re.compile(rb"[0-9]{19}")
+
+def json_dumps(value) -> bytes:
+    """
+    Encode a JSON(B) column value with orjson.
+    
+    orjson rejects integers beyond 64 bits and dict keys that are not
+    strings. Such values go through the stdlib encoder instead, which
+    writes the integers in full and the keys as strings, so anything
+    json_loads returns can be stored again.
+    """
+    try:
+        return orjson.dumps(value)
+    except TypeError:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+def json_loads(data: Union[str, bytes]):
+    """
+    Decode a JSON(B) column value with orjson.
+    
+    Inventory checksums are recomputed from decoded values, so documents
+    that may hold integers beyond 64 bits go through the stdlib decoder,
+    which keeps them exact.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    if _WIDE_INTEGER.search(data) is not None:
+        return json.loads(data)
+    return orjson.loads(data)
+
+def _pool_options() -> dict:
+    """
+    Connection pool options shared by the sync and async engines.
+    
+    Behind PgBouncer the pooler owns the connections, so the engines use
+    NullPool rather than pooling twice.
+    """
+    if settings.DB_EXTERNAL_POOLER:
+        return {"poolclass": NullPool}
+    return {
+        "pool_pre_ping": True,  # Check connection before using from pool
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+# Create SQLAlchemy engine (synchronous, used by scripts such as seed.py)
 engine = create_engine(
     settings.DB_URL,
-    pool_pre_ping=True,  # Check connection before using from pool
-    pool_size=10,        # Default connection pool size
-    max_overflow=20,     # Allow up to 20 connections beyond pool_size
-    pool_recycle=3600,   # Recycle connections after 1 hour
+    json_serializer=json_dumps,
+    json_deserializer=json_loads,
+    **_pool_options(),
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create Base class for models
-Base = declarative_base()
+# Create async SQLAlchemy engine (psycopg3 async driver) for request handlers
+async_engine = create_async_engine(
+    settings.DB_URL,
+    # psycopg encodes/decodes JSON(B) columns with these directly
+    json_serializer=json_dumps,
+    json_deserializer=json_loads,
+    **_pool_options(),
+)
+
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
-# Import models to ensure they're registered with Base
+# Shared Redis client; its connection pool is reused for the process lifetime
+redis_client: Redis = from_url(
+    settings.REDIS_URL,
+    encoding="utf-8",
+    decode_responses=True,
+    max_connections=50,
+    health_check_interval=30,
+)
+
+# Import models so mappers are configured; Base is the single declarative base
 from .db import models  # noqa
+from .db.models import Base  # noqa
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Get a database session.
+    Get an async database session.
+    
+    Only the session is closed here; the engine's pool lives for the process
+    and must not be disposed per request.
     
     Yields:
-        SQLAlchemy Session
+        SQLAlchemy AsyncSession
     """
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Database session error: {str(e)}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
 
 async def get_redis() -> AsyncGenerator[Redis, None]:
     """
-    Get a Redis client.
+    Get the shared Redis client.
+    
+    The client is not closed per request; the pool is closed once on
+    application shutdown.
     
     Yields:
         Redis client
     """
-    redis = from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
-    try:
-        yield redis
-    except Exception as e:
-        logger.error(f"Redis connection error: {str(e)}")
-        raise
-    finally:
-        await redis.close()
+    yield redis_client
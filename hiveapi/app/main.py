@@ -5,11 +5,13 @@ This module initializes the FastAPI application, configures logging,
 sets up Prometheus metrics, and includes all routers.
 """
 
+import asyncio
 import logging
 import time
 from fastapi import FastAPI, Request, Response, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute
 import prometheus_client
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
@@ -29,6 +31,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs" if settings.ADMIN_ENABLED else None,
     redoc_url="/redoc" if settings.ADMIN_ENABLED else None,
+    default_response_class=ORJSONResponse,
 )
 
 # Define Prometheus metrics
@@ -44,6 +47,48 @@ if settings.PROMETHEUS_METRICS:
         ["method", "path"]
     )
 
+    # Label for requests that did not match any route (e.g. 404s), so arbitrary
+    # URLs cannot create new metric series
+    UNMATCHED_ROUTE_LABEL = "unknown"
+
+    # Status codes whose counter children are created up front for every route
+    WARM_STATUS_CODES = (200, 400, 401, 403, 404, 422, 500)
+
+    # Pre-bound metric children keyed by (method, route template[, status code])
+    _latency_children: dict = {}
+    _count_children: dict = {}
+
+    def _latency_child(method: str, path: str):
+        """Return the pre-bound latency histogram child for a method/route pair."""
+        child = _latency_children.get((method, path))
+        if child is None:
+            child = _latency_children[(method, path)] = REQUEST_LATENCY.labels(method=method, path=path)
+        return child
+
+    def _count_child(method: str, path: str, status_code: int):
+        """Return the pre-bound request counter child for a method/route/status triple."""
+        child = _count_children.get((method, path, status_code))
+        if child is None:
+            child = _count_children[(method, path, status_code)] = REQUEST_COUNT.labels(
+                method=method, path=path, status_code=status_code
+            )
+        return child
+
+    def _warm_route_metrics() -> None:
+        """
+        Create the metric children for every registered route.
+        
+        Called once the routers are registered, so the request path only does
+        dictionary lookups on (method, route template).
+        """
+        for route in app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            for method in route.methods or ():
+                _latency_child(method, route.path)
+                for status_code in WARM_STATUS_CODES:
+                    _count_child(method, route.path, status_code)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -72,28 +117,25 @@ async def origin_verification_middleware(request: Request, call_next):
     response = await call_next(request)
     return response
 
-# Add middleware for Prometheus metrics
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    start_time = time.time()
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Record metrics if enabled
-    if settings.PROMETHEUS_METRICS:
-        duration = time.time() - start_time
-        REQUEST_LATENCY.labels(
-            method=request.method, 
-            path=request.url.path
-        ).observe(duration)
-        REQUEST_COUNT.labels(
-            method=request.method, 
-            path=request.url.path,
-            status_code=response.status_code
-        ).inc()
-    
-    return response
+# Add middleware for Prometheus metrics (only registered when metrics are enabled)
+if settings.PROMETHEUS_METRICS:
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        start = time.perf_counter()
+        
+        # Process request
+        response = await call_next(request)
+        
+        duration = time.perf_counter() - start
+        
+        # Label by the matched route template rather than the raw URL
+        route = request.scope.get("route")
+        path = route.path if route is not None else UNMATCHED_ROUTE_LABEL
+        
+        _latency_child(request.method, path).observe(duration)
+        _count_child(request.method, path, response.status_code).inc()
+        
+        return response
 
 # Root endpoint
 @app.get("/", response_class=JSONResponse)
@@ -120,24 +162,23 @@ async def health():
     }
 
 # Metrics endpoint for Prometheus
-@app.get("/metrics", response_class=PlainTextResponse)
+@app.get("/metrics", response_class=Response)
 async def metrics():
     """
     Prometheus metrics endpoint.
     """
     if not settings.PROMETHEUS_METRICS:
-        return PlainTextResponse(
-            content="Metrics collection is disabled",
-            status_code=404
-        )
+        return Response(status_code=404)
     
-    return PlainTextResponse(
-        content=generate_latest().decode(),
+    # generate_latest() already returns the encoded exposition bytes
+    return Response(
+        content=generate_latest(),
         media_type=CONTENT_TYPE_LATEST
     )
 
 # -------------------------------------------------
 # Dynamically import and register routers
+# (deferred to startup so importing this module stays cheap)
 # -------------------------------------------------
 
 def _include_router(module_name: str, prefix: str, tag: str) -> None:
@@ -156,32 +197,78 @@ def _include_router(module_name: str, prefix: str, tag: str) -> None:
     except ImportError as exc:  # pragma: no cover
         logger.warning(f"Could not import router '{module_name}': {exc}")
 
-# Core routers
-_include_router("auth", "/v1/auth", "auth")
-_include_router("characters", "/v1/characters", "characters")
-_include_router("inventory", "/v1/inventory", "inventory")
-# Server stub (test utilities)
-_include_router("server_stub", "/v1/server-stub", "server-stub")
+# Router table: (module name, prefix, tag)
+_ROUTERS = [
+    # Core routers
+    ("auth", "/v1/auth", "auth"),
+    ("characters", "/v1/characters", "characters"),
+    ("inventory", "/v1/inventory", "inventory"),
+    # Server stub (test utilities)
+    ("server_stub", "/v1/server-stub", "server-stub"),
+]
 
 # Admin router (optional)
 if settings.ADMIN_ENABLED:
-    _include_router("admin", "/v1/admin", "admin")
+    _ROUTERS.append(("admin", "/v1/admin", "admin"))
+
+# Long-running tasks started on startup and cancelled on shutdown
+_background_tasks: list = []
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """
     Runs when the application starts.
+    
+    Imports and registers the routers listed in _ROUTERS and starts
+    background tasks.
     """
     logger.info("Starting DayZ HiveAPI")
+    for module_name, prefix, tag in _ROUTERS:
+        _include_router(module_name, prefix, tag)
+    
+    if settings.PROMETHEUS_METRICS:
+        _warm_route_metrics()
+    
+    from .utils.checksums import check_sha256_backend
+    check_sha256_backend()
+    
+    # Write buffered events and server presence to the database in the background
+    from .deps import async_engine, redis_client
+    from .services.events import drain_events_buffer
+    from .services.servers import sync_server_last_seen
+    
+    _background_tasks.append(asyncio.create_task(drain_events_buffer(redis_client, async_engine)))
+    _background_tasks.append(asyncio.create_task(sync_server_last_seen(redis_client, async_engine)))
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """
     Runs when the application shuts down.
+    
+    Stops background tasks and closes the shared Redis pool and database
+    engine pools.
     """
     logger.info("Shutting down DayZ HiveAPI")
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    
+    from .deps import async_engine, engine, redis_client
+    from .services.servers import flush_server_last_seen
+    
+    # Persist any last-seen timestamps collected since the previous flush
+    try:
+        await flush_server_last_seen(redis_client, async_engine)
+    except Exception as e:
+        logger.warning(f"Could not flush server last_seen_at on shutdown: {e}")
+    
+    await redis_client.aclose()
+    await redis_client.connection_pool.disconnect()
+    await async_engine.dispose()
+    engine.dispose()
 
 # If this module is run directly, start the application with Uvicorn
 if __name__ == "__main__":
@@ -6,20 +6,24 @@ This module provides endpoints for administrative functions:
 - Events listing and streaming
 """
 
-import asyncio
-import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional, AsyncGenerator
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Request
+import orjson
+import psycopg
+from psycopg.rows import dict_row
+from psycopg.types.json import set_json_loads
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import StreamingResponse, JSONResponse
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
 
-from ..deps import get_db
+from ..config import settings, to_libpq_dsn
+from ..deps import AsyncSessionLocal, get_db, get_redis, json_loads
 from ..db.models import Player, Character, Server, Event
-from ..services.events import get_recent_events
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,142 +31,243 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# NOTIFY channel populated by the events_notify trigger (migration 0002)
+EVENTS_CHANNEL = "events_channel"
+
+# Redis cache for the overview counts
+OVERVIEW_CACHE_KEY = "admin:overview"
+OVERVIEW_CACHE_TTL_SECONDS = 5
+
+# Seconds without events before a keepalive comment is sent to SSE clients
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Maximum number of events fetched per SSE read
+SSE_BATCH_SIZE = 100
+
+# Events API field name -> Event attribute
+EVENT_FIELDS = {
+    "id": "id",
+    "seq": "seq",
+    "type": "type",
+    "timestamp": "ts",
+    "server_id": "server_id",
+    "actor": "actor",
+    "object_id": "object_id",
+    "payload": "payload_json",
+}
+
 @router.get("/overview")
-async def get_overview(db: Session = Depends(get_db)):
+async def get_overview(
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+):
     """
     Get overview counts for players, characters, servers, and recent events.
+    
+    Results are cached in Redis for OVERVIEW_CACHE_TTL_SECONDS.
     """
-    # Get counts from database
-    player_count = db.query(func.count(Player.id)).scalar()
-    character_count = db.query(func.count(Character.id)).scalar()
-    server_count = db.query(func.count(Server.id)).scalar()
+    cached = await redis.get(OVERVIEW_CACHE_KEY)
+    if cached:
+        # Already serialized JSON - send it as-is
+        return Response(content=cached, media_type="application/json")
     
     # Get recent events count (last 24 hours)
-    one_day_ago = datetime.utcnow() - timedelta(days=1)
-    recent_events_count = db.query(func.count(Event.id)).filter(
-        Event.ts >= one_day_ago
-    ).scalar()
+    now = datetime.now(timezone.utc)
+    one_day_ago = now - timedelta(days=1)
     
-    return {
+    # Fetch all counts in a single round-trip using scalar subqueries
+    player_count, character_count, server_count, recent_events_count = (await db.execute(
+        select(
+            select(func.count(Player.id)).scalar_subquery(),
+            select(func.count(Character.id)).scalar_subquery(),
+            select(func.count(Server.id)).scalar_subquery(),
+            select(func.count(Event.id)).where(Event.ts >= one_day_ago).scalar_subquery(),
+        )
+    )).one()
+    
+    overview = {
         "players": player_count,
         "characters": character_count,
         "servers": server_count,
         "recent_events": recent_events_count,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": now
     }
+    
+    content = orjson.dumps(overview)
+    await redis.set(OVERVIEW_CACHE_KEY, content, ex=OVERVIEW_CACHE_TTL_SECONDS)
+    
+    return Response(content=content, media_type="application/json")
+
+def _event_to_dict(event: Event, fields: Dict[str, str] = EVENT_FIELDS) -> Dict[str, Any]:
+    """Convert an Event object into the events API payload shape."""
+    return {name: getattr(event, attr) for name, attr in fields.items()}
+
+async def _events_json_array(fields: Dict[str, str], **filters) -> AsyncGenerator[bytes, None]:
+    """
+    Encode recent events as a JSON array, one element at a time.
+    
+    Uses its own session: the request's get_db session is closed before a
+    streaming body is sent.
+    """
+    from ..services.events import stream_recent_events
+    
+    yield b"["
+    separator = b""
+    async with AsyncSessionLocal() as db:
+        async for event in stream_recent_events(db, fields=list(fields.values()), **filters):
+            yield separator + orjson.dumps(_event_to_dict(event, fields))
+            separator = b","
+    yield b"]"
 
 @router.get("/events")
 async def get_events(
     limit: int = Query(100, ge=1, le=1000),
     event_type: Optional[str] = None,
-    server_id: Optional[str] = None,
+    server_id: Optional[UUID] = None,
     object_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    before_ts: Optional[datetime] = None,
+    before_seq: Optional[int] = None
 ):
     """
     Get recent events with optional filtering.
     
+    The response is streamed, so memory use does not grow with limit.
+    To page through history, pass the timestamp and seq of the last event
+    returned as before_ts and before_seq.
+    
     Args:
         limit: Maximum number of events to return
         event_type: Filter by event type
         server_id: Filter by server ID
         object_id: Filter by object ID (e.g., character ID)
+        fields: Comma-separated subset of EVENT_FIELDS to return; only those
+            columns are loaded (e.g. "type,timestamp,object_id")
+        before_ts: Only return events older than this timestamp
+        before_seq: Tie-breaker for events sharing before_ts
     """
-    events = get_recent_events(
-        db=db,
-        limit=limit,
-        event_type=event_type,
-        server_id=server_id,
-        object_id=object_id
-    )
+    selected = EVENT_FIELDS
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in EVENT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown event fields: {', '.join(unknown)}"
+            )
+        selected = {name: EVENT_FIELDS[name] for name in names}
     
-    # Convert to dict for JSON response
-    return [
-        {
-            "id": event.id,
-            "type": event.type,
-            "timestamp": event.ts.isoformat(),
-            "server_id": event.server_id,
-            "actor": event.actor,
-            "object_id": event.object_id,
-            "payload": event.payload_json
-        }
-        for event in events
-    ]
-
-async def event_generator(request: Request, db: Session) -> AsyncGenerator[str, None]:
+    return StreamingResponse(
+        _events_json_array(
+            selected,
+            limit=limit,
+            event_type=event_type,
+            server_id=server_id,
+            object_id=object_id,
+            before_ts=before_ts,
+            before_seq=before_seq
+        ),
+        media_type="application/json"
+    )
+
+def _event_row_to_dict(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an events row fetched with dict_row into the SSE payload shape."""
+    return {
+        "id": event["id"],
+        "type": event["type"],
+        "timestamp": event["ts"],
+        "server_id": event["server_id"],
+        "actor": event["actor"],
+        "object_id": event["object_id"],
+        "payload": event["payload_json"]
+    }
+
+async def event_generator(request: Request) -> AsyncGenerator[bytes, None]:
     """
-    Generate SSE events by polling the database.
+    Generate SSE events from PostgreSQL notifications.
+    
+    Sends the latest batch of events on connect, then listens on the events
+    channel and reads the rows named in each notification by id. Reading by
+    id rather than past a ``seq`` cursor keeps events whose transactions
+    commit out of ``seq`` order. A comment line is sent as a keepalive when
+    nothing arrives within SSE_KEEPALIVE_SECONDS.
     
     Args:
         request: FastAPI request object
-        db: Database session
         
     Yields:
         SSE formatted event data
     """
-    # Track the latest event ID we've seen
-    latest_event_id = None
-    
-    # Keep track of when we last queried
-    last_query_time = datetime.utcnow()
-    
     try:
-        while True:
-            # Check if client disconnected
-            if await request.is_disconnected():
-                logger.debug("Client disconnected from SSE stream")
-                break
-            
-            # Get events since last query
-            query = db.query(Event).order_by(Event.ts.desc())
+        aconn = await psycopg.AsyncConnection.connect(
+            to_libpq_dsn(settings.DB_URL),
+            autocommit=True,
+            row_factory=dict_row,
+        )
+        set_json_loads(json_loads, aconn)
+        async with aconn:
+            # Subscribe before reading the backlog so no insert is missed
+            await aconn.execute(f"LISTEN {EVENTS_CHANNEL}")
             
-            if latest_event_id:
-                # Get events newer than the latest we've seen
-                latest_event = db.query(Event).filter(Event.id == latest_event_id).first()
-                if latest_event:
-                    query = query.filter(Event.ts > latest_event.ts)
-                else:
-                    # If we can't find the latest event, use timestamp
-                    query = query.filter(Event.ts > last_query_time)
+            # Initial batch: the most recent events, oldest first
+            cursor = await aconn.execute(
+                "SELECT seq, id, type, ts, server_id, actor, object_id, payload_json"
+                " FROM events ORDER BY seq DESC LIMIT %s",
+                (SSE_BATCH_SIZE,),
+            )
+            backlog = await cursor.fetchall()
+            for event in reversed(backlog):
+                yield b"data: " + orjson.dumps(_event_row_to_dict(event)) + b"\n\n"
             
-            # Limit to reasonable batch size
-            new_events = query.limit(100).all()
+            # Inserts committed while the backlog was read are also notified
+            backlog_ids = {str(event["id"]) for event in backlog}
             
-            # Update latest event ID if we got events
-            if new_events:
-                latest_event_id = new_events[0].id
-                last_query_time = datetime.utcnow()
+            while True:
+                # Check if client disconnected
+                if await request.is_disconnected():
+                    logger.debug("Client disconnected from SSE stream")
+                    break
                 
-                # Send each event as SSE
-                for event in reversed(new_events):  # Oldest first
-                    event_data = {
-                        "id": event.id,
-                        "type": event.type,
-                        "timestamp": event.ts.isoformat(),
-                        "server_id": event.server_id,
-                        "actor": event.actor,
-                        "object_id": event.object_id,
-                        "payload": event.payload_json
-                    }
-                    
-                    # Format as SSE
-                    yield f"data: {json.dumps(event_data)}\n\n"
-            
-            # Wait before polling again
-            await asyncio.sleep(2)
+                # Block on the notification socket until an event arrives
+                notified = [
+                    notify
+                    async for notify in aconn.notifies(timeout=SSE_KEEPALIVE_SECONDS, stop_after=1)
+                ]
+                
+                if not notified:
+                    # Keepalive comment
+                    yield b":\n\n"
+                    continue
+                
+                # Collect the notifications already queued behind the first one
+                notified += [
+                    notify
+                    async for notify in aconn.notifies(timeout=0, stop_after=SSE_BATCH_SIZE)
+                ]
+                
+                # Each payload is an event id; skip rows the backlog already sent
+                event_ids = [notify.payload for notify in notified if notify.payload not in backlog_ids]
+                for start in range(0, len(event_ids), SSE_BATCH_SIZE):
+                    cursor = await aconn.execute(
+                        "SELECT seq, id, type, ts, server_id, actor, object_id, payload_json"
+                        " FROM events WHERE id = ANY(%s::uuid[]) ORDER BY seq",
+                        (event_ids[start:start + SSE_BATCH_SIZE],),
+                    )
+                    for event in await cursor.fetchall():
+                        yield b"data: " + orjson.dumps(_event_row_to_dict(event)) + b"\n\n"
     except Exception as e:
         logger.error(f"Error in event stream: {str(e)}")
-        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
 
 @router.get("/events/stream")
-async def stream_events(request: Request, db: Session = Depends(get_db)):
+async def stream_events(request: Request):
     """
     Stream events as Server-Sent Events (SSE).
     
-    Polls the database every 2 seconds for new events and sends them to the client.
+    Uses PostgreSQL LISTEN/NOTIFY so new events are pushed to the client as
+    soon as they are inserted, reading each notified event by id.
     """
     return StreamingResponse(
-        event_generator(request, db),
+        event_generator(request),
         media_type="text/event-stream"
     )
@@ -5,19 +5,21 @@ This module provides endpoints for server authentication.
 """
 
 import logging
-import uuid
-from datetime import datetime, timedelta
+import time
 from typing import Optional
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from ..config import settings
-from ..deps import get_db
+from ..deps import get_db, get_redis
 from ..db.models import Server
-from ..services.events import record_security_event
+from ..services.events import record_security_event_async
+from ..services.servers import touch_server_last_seen
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,9 +27,12 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Development signing secret, pre-encoded so PyJWT does not convert it per call
+DEV_JWT_SECRET = b"development-secret-not-for-production"
+
 # Define request and response models
 class ServerLoginRequest(BaseModel):
-    server_id: str
+    server_id: UUID
     proof: Optional[str] = None
 
 class TokenResponse(BaseModel):
@@ -38,7 +43,8 @@ class TokenResponse(BaseModel):
 @router.post("/server-login", response_model=TokenResponse)
 async def server_login(
     request: ServerLoginRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
     """
     Authenticate a server and return an access token.
@@ -47,7 +53,7 @@ async def server_login(
     Otherwise, proof signature would be validated (not implemented yet).
     """
     # Check if server exists
-    server = db.query(Server).filter(Server.id == request.server_id).first()
+    server = await db.get(Server, request.server_id)
     if not server:
         logger.warning(f"Login attempt for non-existent server ID: {request.server_id}")
         raise HTTPException(
@@ -55,42 +61,48 @@ async def server_login(
             detail="Invalid server credentials",
         )
     
-    # Update server last seen
-    server.last_seen_at = datetime.utcnow()
-    db.commit()
-    
-    # Log security event
-    record_security_event(
-        db=db,
-        event_type="server_login",
-        server_id=server.id,
-        payload={"host_fingerprint": server.host_fingerprint}
-    )
+    # Update server last seen (debounced) and buffer the login event in one
+    # Redis round trip. Both are best-effort, so a Redis error is logged and
+    # the login still succeeds.
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            await touch_server_last_seen(pipe, server.id)
+            await record_security_event_async(
+                redis=pipe,
+                event_type="server_login",
+                server_id=server.id,
+                payload={"host_fingerprint": server.host_fingerprint}
+            )
+            await pipe.execute()
+    except RedisError as e:
+        logger.error(f"Could not record login for server {server.id} in Redis: {str(e)}")
     
-    # Generate token expiration
-    expires_delta = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
-    expire = datetime.utcnow() + expires_delta
+    # Generate token expiration (epoch seconds)
+    expires_in = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    expire = int(time.time()) + expires_in
     
     # For development/testing, skip signature validation if not required
     if not settings.REQUEST_SIGNATURE_REQUIRED:
+        # Imported lazily; only this branch signs tokens
+        import jwt
+        
         logger.info(f"Signature validation skipped for server: {server.id}")
         
         # Create dummy token payload
         token_data = {
-            "sub": server.id,
+            "sub": str(server.id),
             "iss": settings.JWT_ISSUER,
-            "exp": expire.timestamp(),
+            "exp": expire,
             "type": "server",
-            "cluster": server.cluster_id,
+            "cluster": str(server.cluster_id),
         }
         
         # Use a simple secret for development
-        dev_secret = "development-secret-not-for-production"
-        token = jwt.encode(token_data, dev_secret, algorithm="HS256")
+        token = jwt.encode(token_data, DEV_JWT_SECRET, algorithm="HS256")
         
         return TokenResponse(
             access_token=token,
-            expires_in=int(expires_delta.total_seconds())
+            expires_in=expires_in
         )
     
     # In production, validate proof signature (not implemented yet)
@@ -5,18 +5,22 @@ This module provides endpoints for character lifecycle management.
 """
 
 import logging
-import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+from sqlalchemy import bindparam, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis.asyncio import Redis
 
 from ..config import settings
-from ..deps import get_db
+from ..deps import get_db, get_redis
 from ..db.models import Player, Character, Server, Cluster
-from ..services.events import record_character_event
+from ..services.events import bulk_append_events, record_character_event
+from ..services.cache import get_character_owner, invalidate_character_owner
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -24,25 +28,82 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+# Largest number of characters accepted by one /claim-batch call
+CLAIM_BATCH_MAX_SIZE = 500
+
+# Position and stats given to newly created characters
+DEFAULT_POSITION = {"x": 0, "y": 0, "z": 0}
+DEFAULT_STATS = {"health": 100, "blood": 5000, "water": 100, "energy": 100}
+
+# Heartbeat in one round trip: update the character (merging stats with JSONB
+# ||) and append its heartbeat event from the updated row. The event is
+# sampled against the pre-update row: it is written for the first heartbeat
+# in each :event_interval window, or when the character moved more than
+# :event_min_distance meters. With :enforce_owner the update only matches
+# a row this server owns, checked against the row itself rather than the
+# cached owner
+_HEARTBEAT_SQL = text("""
+    WITH prev AS (
+        SELECT last_seen_at, position
+        FROM characters
+        WHERE id = :character_id
+    ), upd AS (
+        UPDATE characters
+        SET last_seen_at = now(),
+            position = COALESCE(:position, position),
+            stats_json = CASE WHEN :stats IS NULL THEN stats_json ELSE stats_json || :stats END
+        WHERE id = :character_id
+          AND (owned_by_server = :server_id OR NOT :enforce_owner)
+        RETURNING id, player_id, cluster_id, owned_by_server, life_state,
+                  position, stats_json, inventory_checksum, last_seen_at
+    ), ev AS (
+        INSERT INTO events (type, server_id, object_id, payload_json, ts)
+        SELECT 'character_heartbeat', :server_id, upd.id::text,
+               jsonb_build_object('position', upd.position), now()
+        FROM upd, prev
+        WHERE prev.last_seen_at IS NULL
+           OR floor(extract(epoch FROM prev.last_seen_at) / :event_interval)
+              < floor(extract(epoch FROM now()) / :event_interval)
+           OR sqrt(power((upd.position->>'x')::float8 - (prev.position->>'x')::float8, 2)
+                   + power((upd.position->>'y')::float8 - (prev.position->>'y')::float8, 2)
+                   + power((upd.position->>'z')::float8 - (prev.position->>'z')::float8, 2))
+              > :event_min_distance
+    )
+    SELECT * FROM upd
+""").bindparams(
+    bindparam("position", type_=JSONB(none_as_null=True)),
+    bindparam("stats", type_=JSONB(none_as_null=True)),
+)
+
 # Define request and response models
 class ClaimRequest(BaseModel):
     platform_uid: str
-    cluster_id: str
-    server_id: str
+    cluster_id: UUID
+    server_id: UUID
     position: Optional[Dict[str, float]] = None
     stats: Optional[Dict[str, Any]] = None
 
+class ClaimBatchItem(BaseModel):
+    platform_uid: str
+    position: Optional[Dict[str, float]] = None
+    stats: Optional[Dict[str, Any]] = None
+
+class ClaimBatchRequest(BaseModel):
+    cluster_id: UUID
+    server_id: UUID
+    characters: List[ClaimBatchItem] = Field(..., min_length=1, max_length=CLAIM_BATCH_MAX_SIZE)
+
 class HeartbeatRequest(BaseModel):
-    character_id: str
-    server_id: str
+    character_id: UUID
+    server_id: UUID
     position: Optional[Dict[str, float]] = None
     stats: Optional[Dict[str, Any]] = None
 
 class CharacterResponse(BaseModel):
-    id: str
-    player_id: str
-    cluster_id: str
-    owned_by_server: Optional[str] = None
+    id: UUID
+    player_id: UUID
+    cluster_id: UUID
+    owned_by_server: Optional[UUID] = None
     life_state: str
     position: Optional[Dict[str, float]] = None
     stats: Optional[Dict[str, Any]] = None
@@ -72,146 +133,269 @@ def get_server_id(
         detail="Authentication required"
     )
 
-@router.post("/claim", response_model=CharacterResponse)
-async def claim_character(
-    request: ClaimRequest,
-    db: Session = Depends(get_db),
-    server_id: str = Depends(get_server_id),
-):
+def _character_response(character) -> CharacterResponse:
+    """Build a CharacterResponse from a Character or a characters row."""
+    return CharacterResponse(
+        id=character.id,
+        player_id=character.player_id,
+        cluster_id=character.cluster_id,
+        owned_by_server=character.owned_by_server,
+        life_state=character.life_state,
+        position=character.position,
+        stats=character.stats_json,
+        inventory_checksum=character.inventory_checksum,
+        last_seen_at=character.last_seen_at
+    )
+
+async def _verify_claim_target(db: AsyncSession, server_id: UUID, cluster_id: UUID) -> None:
     """
-    Claim a character for a player in a specific cluster.
+    Check that the claiming server and the target cluster exist.
     
-    If the player doesn't exist, it will be created.
-    If the character doesn't exist, it will be created.
+    Both are resolved in one statement; the server row anchors the result
+    and the cluster is outer-joined onto it.
+    
+    Args:
+        db: Database session
+        server_id: UUID of the claiming server
+        cluster_id: UUID of the cluster
+    
+    Raises:
+        HTTPException: 404 if either does not exist
     """
+    row = (await db.execute(
+        select(Server.id, Cluster.id)
+        .select_from(Server)
+        .outerjoin(Cluster, Cluster.id == cluster_id)
+        .where(Server.id == server_id)
+    )).first()
+    
     # Verify server exists
-    server = db.query(Server).filter(Server.id == request.server_id).first()
-    if not server:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Server not found"
         )
     
     # Verify cluster exists
-    cluster = db.query(Cluster).filter(Cluster.id == request.cluster_id).first()
-    if not cluster:
+    if row[1] is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cluster not found"
         )
+
+@router.post("/claim", response_model=CharacterResponse)
+async def claim_character(
+    request: ClaimRequest,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+    server_id: str = Depends(get_server_id),
+):
+    """
+    Claim a character for a player in a specific cluster.
     
-    # Find or create player
-    player = db.query(Player).filter(Player.platform_uid == request.platform_uid).first()
-    if not player:
-        player = Player(
-            id=str(uuid.uuid4()),
+    If the player doesn't exist, it will be created.
+    If the character doesn't exist, it will be created.
+    """
+    await _verify_claim_target(db, request.server_id, request.cluster_id)
+    
+    # Create the player or update its last seen time
+    player = (await db.execute(
+        pg_insert(Player)
+        .values(
             platform_uid=request.platform_uid,
             reputation=0,
             meta={"created_by": "api"},
-            created_at=datetime.utcnow(),
-            last_seen_at=datetime.utcnow()
+            last_seen_at=func.now()
         )
-        db.add(player)
-        db.flush()
-        logger.info(f"Created new player: {player.id} for platform_uid: {request.platform_uid}")
-    else:
-        # Update last seen
-        player.last_seen_at = datetime.utcnow()
+        .on_conflict_do_update(
+            index_elements=[Player.platform_uid],
+            set_={"last_seen_at": func.now()}
+        )
+        .returning(Player),
+        execution_options={"populate_existing": True}
+    )).scalar_one()
     
-    # Find or create character
-    character = db.query(Character).filter(
-        Character.player_id == player.id,
-        Character.cluster_id == request.cluster_id,
-        Character.life_state == "alive"
-    ).first()
+    # Create the alive character or claim it for this server
+    on_claim = {"owned_by_server": request.server_id, "last_seen_at": func.now()}
+    if request.position:
+        on_claim["position"] = request.position
+    if request.stats:
+        on_claim["stats_json"] = Character.stats_json.op("||")(
+            bindparam("stats", request.stats, type_=JSONB)
+        )
     
-    if not character:
-        # Create new character
-        character = Character(
-            id=str(uuid.uuid4()),
+    character, created = (await db.execute(
+        pg_insert(Character)
+        .values(
             player_id=player.id,
             cluster_id=request.cluster_id,
             owned_by_server=request.server_id,
             life_state="alive",
-            position=request.position or {"x": 0, "y": 0, "z": 0},
-            stats_json=request.stats or {"health": 100, "blood": 5000, "water": 100, "energy": 100},
-            created_at=datetime.utcnow(),
-            last_seen_at=datetime.utcnow()
+            position=request.position or DEFAULT_POSITION,
+            stats_json=request.stats or DEFAULT_STATS,
+            last_seen_at=func.now()
         )
-        db.add(character)
-        
-        # Record event
-        record_character_event(
-            db=db,
-            character_id=character.id,
-            server_id=request.server_id,
-            event_type="character_created",
-            payload={"position": character.position}
+        .on_conflict_do_update(
+            index_elements=[Character.player_id, Character.cluster_id],
+            index_where=text("life_state = 'alive'"),
+            set_=on_claim
         )
-        
+        # xmax is 0 only for a row this statement inserted
+        .returning(Character, literal_column("xmax = 0").label("created")),
+        execution_options={"populate_existing": True}
+    )).one()
+    
+    # Record event
+    record_character_event(
+        db=db,
+        character_id=character.id,
+        server_id=request.server_id,
+        event_type="character_created" if created else "character_claimed",
+        payload={"position": character.position}
+    )
+    
+    if created:
         logger.info(f"Created new character: {character.id} for player: {player.id}")
     else:
-        # Update existing character
-        character.owned_by_server = request.server_id
-        character.last_seen_at = datetime.utcnow()
-        
-        if request.position:
-            character.position = request.position
-        
-        if request.stats:
-            # Merge stats
-            if character.stats_json:
-                character.stats_json = {**character.stats_json, **request.stats}
-            else:
-                character.stats_json = request.stats
-        
-        # Record event
-        record_character_event(
-            db=db,
-            character_id=character.id,
-            server_id=request.server_id,
-            event_type="character_claimed",
-            payload={"position": character.position}
-        )
-        
         logger.info(f"Claimed existing character: {character.id} for player: {player.id}")
     
     # Commit changes
-    db.commit()
+    await db.commit()
+    
+    # Ownership may have moved to this server
+    await invalidate_character_owner(redis, character.id)
     
     # Return character info
-    return CharacterResponse(
-        id=character.id,
-        player_id=character.player_id,
-        cluster_id=character.cluster_id,
-        owned_by_server=character.owned_by_server,
-        life_state=character.life_state,
-        position=character.position,
-        stats=character.stats_json,
-        inventory_checksum=character.inventory_checksum,
-        last_seen_at=character.last_seen_at
+    return _character_response(character)
+
+@router.post("/claim-batch", response_model=List[CharacterResponse])
+async def claim_characters_batch(
+    request: ClaimBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+    server_id: str = Depends(get_server_id),
+):
+    """
+    Claim many characters for one server, e.g. after the server restarts.
+    
+    Each entry behaves like /claim, but the server and cluster are checked
+    once and players and characters are upserted with multi-row statements.
+    Characters are returned in request order.
+    """
+    platform_uids = [item.platform_uid for item in request.characters]
+    if len(set(platform_uids)) != len(platform_uids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate platform_uid in batch"
+        )
+    
+    await _verify_claim_target(db, request.server_id, request.cluster_id)
+    
+    # Create the players or update their last seen time
+    result = await db.execute(
+        pg_insert(Player)
+        .values([
+            {
+                "platform_uid": platform_uid,
+                "reputation": 0,
+                "meta": {"created_by": "api"},
+                "last_seen_at": func.now()
+            }
+            for platform_uid in platform_uids
+        ])
+        .on_conflict_do_update(
+            index_elements=[Player.platform_uid],
+            set_={"last_seen_at": func.now()}
+        )
+        .returning(Player.id, Player.platform_uid)
     )
+    player_ids = {row.platform_uid: row.id for row in result}
+    
+    # Entries that update the same columns on claim share one upsert, so a
+    # batch takes at most four character statements
+    groups: Dict[tuple, List[ClaimBatchItem]] = {}
+    for item in request.characters:
+        groups.setdefault((bool(item.position), bool(item.stats)), []).append(item)
+    
+    claimed = {}
+    for (has_position, has_stats), items in groups.items():
+        insert_stmt = pg_insert(Character).values([
+            {
+                "player_id": player_ids[item.platform_uid],
+                "cluster_id": request.cluster_id,
+                "owned_by_server": request.server_id,
+                "life_state": "alive",
+                "position": item.position or DEFAULT_POSITION,
+                "stats_json": item.stats or DEFAULT_STATS,
+                "last_seen_at": func.now()
+            }
+            for item in items
+        ])
+        
+        on_claim = {"owned_by_server": insert_stmt.excluded.owned_by_server, "last_seen_at": func.now()}
+        if has_position:
+            on_claim["position"] = insert_stmt.excluded.position
+        if has_stats:
+            on_claim["stats_json"] = Character.stats_json.op("||")(insert_stmt.excluded.stats_json)
+        
+        result = await db.execute(
+            insert_stmt
+            .on_conflict_do_update(
+                index_elements=[Character.player_id, Character.cluster_id],
+                index_where=text("life_state = 'alive'"),
+                set_=on_claim
+            )
+            # xmax is 0 only for a row this statement inserted
+            .returning(Character, literal_column("xmax = 0").label("created")),
+            execution_options={"populate_existing": True}
+        )
+        for character, created in result:
+            claimed[character.player_id] = (character, created)
+    
+    characters = [claimed[player_ids[platform_uid]][0] for platform_uid in platform_uids]
+    
+    # Record all claim events with a single COPY
+    await bulk_append_events(db, (
+        {
+            "type": "character_created" if created else "character_claimed",
+            "server_id": request.server_id,
+            "object_id": character.id,
+            "payload_json": {"position": character.position}
+        }
+        for character, created in claimed.values()
+    ))
+    
+    # Commit changes
+    await db.commit()
+    
+    created_count = sum(1 for _, created in claimed.values() if created)
+    logger.info(f"Batch claimed {len(characters)} characters for server {request.server_id} ({created_count} created)")
+    
+    # Ownership may have moved to this server
+    await invalidate_character_owner(redis, *(character.id for character in characters))
+    
+    return [_character_response(character) for character in characters]
 
 @router.post("/heartbeat", response_model=CharacterResponse)
 async def character_heartbeat(
     request: HeartbeatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     server_id: str = Depends(get_server_id),
 ):
     """
     Update character heartbeat to keep it alive.
     """
-    # Find character
-    character = db.query(Character).filter(Character.id == request.character_id).first()
-    if not character:
+    # Check ownership (cached in Redis) before touching the character row
+    owner = await get_character_owner(redis, db, request.character_id)
+    if owner is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Character not found"
         )
     
-    # Check if server owns the character
-    if character.owned_by_server != request.server_id:
-        logger.warning(f"Server {request.server_id} attempted heartbeat for character {character.id} owned by {character.owned_by_server}")
+    if owner != str(request.server_id):
+        logger.warning(f"Server {request.server_id} attempted heartbeat for character {request.character_id} owned by {owner or None}")
         
         # For development, allow any server to update
         if not settings.REQUEST_SIGNATURE_REQUIRED:
@@ -222,40 +406,36 @@ async def character_heartbeat(
                 detail="Server does not own this character"
             )
     
-    # Update character
-    character.last_seen_at = datetime.utcnow()
-    
-    if request.position:
-        character.position = request.position
-    
-    if request.stats:
-        # Merge stats
-        if character.stats_json:
-            character.stats_json = {**character.stats_json, **request.stats}
-        else:
-            character.stats_json = request.stats
-    
-    # Record event
-    record_character_event(
-        db=db,
-        character_id=character.id,
-        server_id=request.server_id,
-        event_type="character_heartbeat",
-        payload={"position": character.position}
-    )
+    # Update character and record the heartbeat event
+    character = (await db.execute(_HEARTBEAT_SQL, {
+        "character_id": request.character_id,
+        "server_id": request.server_id,
+        "position": request.position or None,
+        "stats": request.stats or None,
+        "event_interval": settings.HEARTBEAT_EVENT_INTERVAL_SECONDS,
+        "event_min_distance": settings.HEARTBEAT_EVENT_MIN_DISTANCE,
+        "enforce_owner": settings.REQUEST_SIGNATURE_REQUIRED,
+    })).one_or_none()
+    if not character:
+        # Tell a missing character from one whose cached owner was stale
+        exists = await db.scalar(
+            select(Character.id).where(Character.id == request.character_id)
+        )
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Character not found"
+            )
+        
+        logger.warning(f"Server {request.server_id} attempted heartbeat for character {request.character_id} it no longer owns")
+        await invalidate_character_owner(redis, request.character_id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Server does not own this character"
+        )
     
     # Commit changes
-    db.commit()
+    await db.commit()
     
     # Return character info
-    return CharacterResponse(
-        id=character.id,
-        player_id=character.player_id,
-        cluster_id=character.cluster_id,
-        owned_by_server=character.owned_by_server,
-        life_state=character.life_state,
-        position=character.position,
-        stats=character.stats_json,
-        inventory_checksum=character.inventory_checksum,
-        last_seen_at=character.last_seen_at
-    )
+    return _character_response(character)
@@ -6,15 +6,18 @@ This module provides endpoints for character inventory management.
 
 import logging
 from typing import Dict, List, Any, Optional
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, cast, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 from ..deps import get_db
 from ..db.models import Character
-from ..services.inventory import compute_inventory_checksum, apply_ops, detect_conflicts
+from ..services.inventory import canonical_json, compute_checksum_bytes, apply_ops, detect_conflicts
 from ..services.events import record_inventory_event
 
 # Configure logging
@@ -25,19 +28,19 @@ router = APIRouter()
 
 # Define request and response models
 class ApplyInventoryRequest(BaseModel):
-    character_id: str
-    server_id: str
+    character_id: UUID
+    server_id: UUID
     ops: List[Dict[str, Any]]
     base_checksum: str
 
 class SetInventoryRequest(BaseModel):
-    character_id: str
-    server_id: str
+    character_id: UUID
+    server_id: UUID
     slots: Dict[str, Any]
     client_checksum: Optional[str] = None
 
 class InventoryResponse(BaseModel):
-    character_id: str
+    character_id: UUID
     checksum: str
     conflict: bool = False
     conflict_details: Optional[Dict[str, Any]] = None
@@ -65,10 +68,44 @@ def get_server_id(
         detail="Authentication required"
     )
 
+def _jsonb_from_canonical(canonical: bytes):
+    """Bind canonical JSON bytes as a jsonb value without serializing them again."""
+    return cast(literal(canonical.decode(), Text), JSONB)
+
+def _canonical_inventory(inventory: Dict[str, Any]) -> bytes:
+    """
+    Serialize an inventory to canonical JSON, rejecting unrepresentable data.
+    
+    Raises:
+        HTTPException: 422 if the inventory cannot be serialized
+    """
+    try:
+        return canonical_json(inventory)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Inventory cannot be serialized: {str(e)}"
+        )
+
+def _conflict_response(request: ApplyInventoryRequest, current_checksum: str) -> InventoryResponse:
+    """Build the conflict response for an apply whose base_checksum is stale."""
+    logger.warning(f"Inventory conflict detected for character {request.character_id}: base_checksum={request.base_checksum}, current={current_checksum}")
+    
+    return InventoryResponse(
+        character_id=request.character_id,
+        checksum=current_checksum,
+        conflict=True,
+        conflict_details={
+            "base_checksum": request.base_checksum,
+            "current_checksum": current_checksum,
+            "message": "Inventory has been modified since base_checksum was computed"
+        }
+    )
+
 @router.post("/apply", response_model=InventoryResponse)
 async def apply_inventory_ops(
     request: ApplyInventoryRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     server_id: str = Depends(get_server_id),
 ):
     """
@@ -77,17 +114,22 @@ async def apply_inventory_ops(
     Requires base_checksum to match the current inventory checksum,
     otherwise reports a conflict.
     """
-    # Find character
-    character = db.query(Character).filter(Character.id == request.character_id).first()
-    if not character:
+    # Read only the ownership and checksum columns first: a conflict, the
+    # common outcome when servers race, never fetches inventory_json
+    result = await db.execute(
+        select(Character.owned_by_server, Character.inventory_checksum)
+        .where(Character.id == request.character_id)
+    )
+    row = result.one_or_none()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Character not found"
         )
     
-    # Check if server owns the character
-    if character.owned_by_server != request.server_id:
-        logger.warning(f"Server {request.server_id} attempted inventory apply for character {character.id} owned by {character.owned_by_server}")
+    owner = str(row.owned_by_server) if row.owned_by_server else None
+    if owner != str(request.server_id):
+        logger.warning(f"Server {request.server_id} attempted inventory apply for character {request.character_id} owned by {owner}")
         
         # For development, allow any server to update
         if not settings.REQUEST_SIGNATURE_REQUIRED:
@@ -99,40 +141,42 @@ async def apply_inventory_ops(
             )
     
     # Check for conflicts
-    current_checksum = character.inventory_checksum
-    if current_checksum and current_checksum != request.base_checksum:
-        logger.warning(f"Inventory conflict detected for character {character.id}: base_checksum={request.base_checksum}, current={current_checksum}")
-        
-        # Return conflict response
-        return InventoryResponse(
-            character_id=character.id,
-            checksum=current_checksum,
-            conflict=True,
-            conflict_details={
-                "base_checksum": request.base_checksum,
-                "current_checksum": current_checksum,
-                "message": "Inventory has been modified since base_checksum was computed"
-            }
-        )
+    if row.inventory_checksum and row.inventory_checksum != request.base_checksum:
+        return _conflict_response(request, row.inventory_checksum)
+    
+    # Lock the row and re-check, so a concurrent apply cannot be lost
+    result = await db.execute(
+        select(Character.inventory_json, Character.inventory_checksum)
+        .where(Character.id == request.character_id)
+        .with_for_update()
+    )
+    locked = result.one()
+    if locked.inventory_checksum and locked.inventory_checksum != request.base_checksum:
+        await db.rollback()
+        return _conflict_response(request, locked.inventory_checksum)
     
     # Get current inventory or initialize empty
-    current_inventory = character.inventory_json or {}
+    current_inventory = locked.inventory_json or {}
     
     # Apply operations
     try:
         updated_inventory = apply_ops(current_inventory, request.ops)
         
-        # Compute new checksum
-        new_checksum = compute_inventory_checksum(updated_inventory)
+        # Serialize once for both the new checksum and the stored value
+        canonical = _canonical_inventory(updated_inventory)
+        new_checksum = compute_checksum_bytes(canonical)
         
         # Update character
-        character.inventory_json = updated_inventory
-        character.inventory_checksum = new_checksum
+        await db.execute(
+            update(Character)
+            .where(Character.id == request.character_id)
+            .values(inventory_json=_jsonb_from_canonical(canonical), inventory_checksum=new_checksum)
+        )
         
         # Record event
         record_inventory_event(
             db=db,
-            character_id=character.id,
+            character_id=request.character_id,
             server_id=request.server_id,
             event_type="inventory_updated",
             checksum=new_checksum,
@@ -140,19 +184,23 @@ async def apply_inventory_ops(
         )
         
         # Commit changes
-        db.commit()
+        await db.commit()
         
-        logger.info(f"Applied {len(request.ops)} inventory operations for character {character.id}")
+        logger.info(f"Applied {len(request.ops)} inventory operations for character {request.character_id}")
         
         # Return success response
         return InventoryResponse(
-            character_id=character.id,
+            character_id=request.character_id,
             checksum=new_checksum
         )
     
+    except HTTPException:
+        await db.rollback()
+        raise
+    
     except Exception as e:
         logger.error(f"Error applying inventory operations: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error applying inventory operations: {str(e)}"
@@ -161,7 +209,7 @@ async def apply_inventory_ops(
 @router.post("/set", response_model=InventoryResponse)
 async def set_inventory(
     request: SetInventoryRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     server_id: str = Depends(get_server_id),
 ):
     """
@@ -169,8 +217,9 @@ async def set_inventory(
     
     Computes a new checksum for the inventory.
     """
-    # Find character
-    character = db.query(Character).filter(Character.id == request.character_id).first()
+    # Find and lock the character, so ownership is checked on the row that
+    # is written and a concurrent claim cannot slip in between
+    character = await db.get(Character, request.character_id, with_for_update=True)
     if not character:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -178,8 +227,9 @@ async def set_inventory(
         )
     
     # Check if server owns the character
-    if character.owned_by_server != request.server_id:
-        logger.warning(f"Server {request.server_id} attempted inventory set for character {character.id} owned by {character.owned_by_server}")
+    owner = str(character.owned_by_server) if character.owned_by_server else None
+    if owner != str(request.server_id):
+        logger.warning(f"Server {request.server_id} attempted inventory set for character {character.id} owned by {owner}")
         
         # For development, allow any server to update
         if not settings.REQUEST_SIGNATURE_REQUIRED:
@@ -190,28 +240,38 @@ async def set_inventory(
                 detail="Server does not own this character"
             )
     
+    # Serialize once for both the checksum and the stored value
+    canonical = _canonical_inventory(request.slots)
+    new_checksum = compute_checksum_bytes(canonical)
+    
     # Verify client checksum if provided
-    if request.client_checksum:
-        computed_checksum = compute_inventory_checksum(request.slots)
-        if computed_checksum != request.client_checksum:
-            logger.warning(f"Client checksum mismatch for character {character.id}")
-            return InventoryResponse(
-                character_id=character.id,
-                checksum=computed_checksum,
-                conflict=True,
-                conflict_details={
-                    "client_checksum": request.client_checksum,
-                    "computed_checksum": computed_checksum,
-                    "message": "Client checksum does not match computed checksum"
-                }
-            )
+    if request.client_checksum and new_checksum != request.client_checksum:
+        logger.warning(f"Client checksum mismatch for character {character.id}")
+        return InventoryResponse(
+            character_id=character.id,
+            checksum=new_checksum,
+            conflict=True,
+            conflict_details={
+                "client_checksum": request.client_checksum,
+                "computed_checksum": new_checksum,
+                "message": "Client checksum does not match computed checksum"
+            }
+        )
+    
+    # Slots hashing to the stored checksum (e.g. a client re-sending after a
+    # timeout) are the stored inventory, so skip writing the row. The slots
+    # are hashed first: trusting client_checksum alone would drop a changed
+    # inventory sent with a stale checksum.
+    if new_checksum == character.inventory_checksum:
+        logger.debug(f"Inventory for character {character.id} unchanged, skipping set")
+        return InventoryResponse(
+            character_id=character.id,
+            checksum=new_checksum
+        )
     
     try:
-        # Compute checksum
-        new_checksum = compute_inventory_checksum(request.slots)
-        
         # Update character
-        character.inventory_json = request.slots
+        character.inventory_json = _jsonb_from_canonical(canonical)
         character.inventory_checksum = new_checksum
         
         # Record event
@@ -224,7 +284,7 @@ async def set_inventory(
         )
         
         # Commit changes
-        db.commit()
+        await db.commit()
         
         logger.info(f"Set inventory for character {character.id}")
         
@@ -236,7 +296,7 @@ async def set_inventory(
     
     except Exception as e:
         logger.error(f"Error setting inventory: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error setting inventory: {str(e)}"
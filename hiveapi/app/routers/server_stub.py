@@ -4,14 +4,17 @@ Server stub router for DayZ HiveAPI.
 This module provides endpoints for testing without a real DayZ server.
 """
 
+import asyncio
+import functools
 import logging
-import uuid
-from datetime import datetime
+import secrets
 from typing import Dict, Any
+from uuid import UUID
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 
@@ -29,9 +32,9 @@ class PingResponse(BaseModel):
     ok: bool = True
 
 class BootstrapResponse(BaseModel):
-    tenant_id: str
-    cluster_id: str
-    server_id: str
+    tenant_id: UUID
+    cluster_id: UUID
+    server_id: UUID
 
 def generate_rsa_keypair():
     """Generate RSA keypair for testing."""
@@ -52,6 +55,17 @@ def generate_rsa_keypair():
     
     return public_pem
 
+@functools.lru_cache(maxsize=1)
+def _stub_public_pem() -> str:
+    """
+    Generate the stub server public key once per process.
+    
+    Every bootstrapped test server shares this key, which is only
+    acceptable because server-stub exists for testing.
+    """
+    logger.warning("server-stub: generating one RSA keypair shared by all stub servers; never enable server-stub in production")
+    return generate_rsa_keypair()
+
 @router.get("/ping", response_model=PingResponse)
 async def ping():
     """
@@ -60,75 +74,68 @@ async def ping():
     return PingResponse(ok=True)
 
 @router.post("/bootstrap", response_model=BootstrapResponse)
-async def bootstrap(db: Session = Depends(get_db)):
+async def bootstrap(db: AsyncSession = Depends(get_db)):
     """
     Ensure that a tenant, cluster, and server exist for testing.
     This is idempotent - if entities already exist, returns their IDs.
     """
     # Check if tenant exists
-    tenant = db.query(Tenant).first()
+    tenant = (await db.execute(select(Tenant).limit(1))).scalar_one_or_none()
     if not tenant:
         # Create tenant
-        tenant_id = str(uuid.uuid4())
         tenant = Tenant(
-            id=tenant_id,
             name="Test Tenant",
             owner_id="server-stub",
             settings_json={"description": "Created by server-stub"}
         )
         db.add(tenant)
-        db.flush()
-        logger.info(f"Created test tenant: {tenant_id}")
+        await db.flush()
+        logger.info(f"Created test tenant: {tenant.id}")
     
     # Check if cluster exists
-    cluster = db.query(Cluster).filter(Cluster.tenant_id == tenant.id).first()
+    cluster = (await db.execute(select(Cluster).where(Cluster.tenant_id == tenant.id).limit(1))).scalar_one_or_none()
     if not cluster:
         # Create cluster
-        cluster_id = str(uuid.uuid4())
         cluster = Cluster(
-            id=cluster_id,
             tenant_id=tenant.id,
             name="Test Cluster",
             policy_json={"description": "Created by server-stub"}
         )
         db.add(cluster)
-        db.flush()
-        logger.info(f"Created test cluster: {cluster_id}")
+        await db.flush()
+        logger.info(f"Created test cluster: {cluster.id}")
     
     # Check if server exists
-    server = db.query(Server).filter(Server.cluster_id == cluster.id).first()
+    server = (await db.execute(select(Server).where(Server.cluster_id == cluster.id).limit(1))).scalar_one_or_none()
     if not server:
-        # Generate RSA public key
-        public_pem = generate_rsa_keypair()
+        # Get the cached stub public key; the first call generates it in a
+        # worker thread since keygen is CPU-bound and would stall the event loop
+        public_pem = await asyncio.to_thread(_stub_public_pem)
         
         # Create server
-        server_id = str(uuid.uuid4())
         server = Server(
-            id=server_id,
             cluster_id=cluster.id,
             name="Test Server",
-            host_fingerprint=f"stub:fingerprint:{server_id}",
+            host_fingerprint=f"stub:fingerprint:{secrets.token_hex(16)}",
             public_key_pem=public_pem,
-            status="active",
-            created_at=datetime.utcnow()
+            status="active"
         )
         db.add(server)
-        db.flush()
-        logger.info(f"Created test server: {server_id}")
+        await db.flush()
+        logger.info(f"Created test server: {server.id}")
         
         # Record event
         event = Event(
-            id=str(uuid.uuid4()),
             type="server_created",
             actor="server-stub",
-            object_id=server_id,
-            server_id=server_id,
+            object_id=str(server.id),
+            server_id=server.id,
             payload_json={"method": "bootstrap", "source": "server-stub"}
         )
         db.add(event)
     
     # Commit changes
-    db.commit()
+    await db.commit()
     
     # Return IDs
     return BootstrapResponse(
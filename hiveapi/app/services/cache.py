@@ -0,0 +1,68 @@
+"""
+Cache service for DayZ HiveAPI.
+
+This module provides small Redis read-through caches for values that are
+checked on every request but change rarely. Only scalar lookups are cached
+here, never authenticated response payloads.
+"""
+
+import logging
+from typing import Optional
+from uuid import UUID
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models import Character
+
+logger = logging.getLogger(__name__)
+
+# Redis key holding the owning server of a character
+CHARACTER_OWNER_KEY = "char:own:{}"
+
+# Seconds a cached owner is trusted before it is re-read
+CHARACTER_OWNER_TTL_SECONDS = 60
+
+async def get_character_owner(redis: Redis, db: AsyncSession, character_id: UUID) -> Optional[str]:
+    """
+    Get the server that owns a character, reading through Redis.
+    
+    On a cache miss only the owned_by_server column is read, never the
+    inventory document.
+    
+    Args:
+        redis: Redis client
+        db: Database session
+        character_id: UUID of the character
+    
+    Returns:
+        The owning server ID as a string, "" if the character has no owner,
+        or None if the character does not exist
+    """
+    key = CHARACTER_OWNER_KEY.format(character_id)
+    
+    owner = await redis.get(key)
+    if owner is not None:
+        return owner
+    
+    row = (await db.execute(
+        select(Character.owned_by_server).where(Character.id == character_id)
+    )).one_or_none()
+    if row is None:
+        return None
+    
+    owner = str(row.owned_by_server) if row.owned_by_server else ""
+    await redis.set(key, owner, ex=CHARACTER_OWNER_TTL_SECONDS)
+    return owner
+
+async def invalidate_character_owner(redis: Redis, *character_ids: UUID) -> None:
+    """
+    Drop the cached owner of characters after their ownership changes.
+    
+    Args:
+        redis: Redis client
+        character_ids: UUIDs of the characters, deleted in one command
+    """
+    if character_ids:
+        await redis.delete(*(CHARACTER_OWNER_KEY.format(character_id) for character_id in character_ids))
@@ -5,19 +5,80 @@ This module provides utilities for recording and retrieving events
 for auditing and monitoring purposes.
 """
 
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+import os
+import socket
+import time
+from typing import Optional, Dict, Any, Iterable, List, AsyncIterator, Sequence, cast
+from datetime import datetime, timezone
+import orjson
+import psycopg
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy import desc, exc, select, tuple_
+from sqlalchemy.orm import load_only
 from uuid import UUID
 
 from ..db.models import Event
 
 logger = logging.getLogger(__name__)
 
+# Redis list used as a write-behind buffer for events (LPUSH in, LMOVE out)
+EVENTS_BUFFER_KEY = "events:buffer"
+
+# Per-worker Redis list holding the batch being written; items are moved
+# here from the buffer and deleted only after the COPY commits
+EVENTS_PROCESSING_KEY = "events:processing:{}"
+
+# Redis counter of failed attempts at the batch in a processing list
+EVENTS_ATTEMPTS_KEY = "events:processing:{}:attempts"
+
+# Redis key a draining worker keeps refreshed while it is alive
+EVENTS_WORKER_ALIVE_KEY = "events:processing:{}:alive"
+
+# Redis set of workers that may own a processing list
+EVENTS_WORKERS_KEY = "events:workers"
+
+# Redis list of buffered events that fail to write even on their own
+EVENTS_DEADLETTER_KEY = "events:deadletter"
+
+# Failed attempts at a whole batch before it is split to find bad rows
+EVENTS_FLUSH_MAX_ATTEMPTS = 3
+
+# Seconds a worker's liveness key outlives its last refresh; processing
+# lists of workers silent for longer are returned to the buffer
+EVENTS_WORKER_TTL_SECONDS = 60
+
+# Errors caused by the content of an event rather than by the database
+# being unavailable; only these dead-letter a row
+_EVENT_ROW_ERRORS = (
+    ValueError,
+    KeyError,
+    TypeError,
+    psycopg.DataError,
+    psycopg.IntegrityError,
+    exc.DataError,
+    exc.IntegrityError,
+)
+
+# Maximum number of buffered events written per COPY
+EVENTS_BUFFER_BATCH_SIZE = 500
+
+# Seconds to block waiting for buffered events
+EVENTS_BUFFER_POLL_SECONDS = 1
+
+# Rows fetched per round trip by stream_recent_events
+EVENTS_STREAM_BATCH_SIZE = 100
+
+# Rows written per COPY statement by bulk_append_events
+EVENTS_COPY_BATCH_SIZE = 10000
+
+# COPY statement shared by the buffer flush and bulk backfills
+EVENTS_COPY_SQL = "COPY events (type, actor, object_id, server_id, payload_json, ts) FROM STDIN"
+
 def append_event(
-    db: Session,
+    db: AsyncSession,
     type: str,
     server_id: Optional[str] = None,
     actor: Optional[str] = None,
@@ -47,10 +108,9 @@ def append_event(
         event = Event(
             type=type,
             actor=actor,
-            object_id=object_id,
+            object_id=str(object_id) if object_id is not None else None,
             server_id=server_id,
-            payload_json=payload,
-            ts=datetime.utcnow()
+            payload_json=payload
         )
         
         # Add to session
@@ -66,12 +126,101 @@ def append_event(
         # Don't raise exception - events should be non-blocking
         return None
 
-def get_recent_events(
-    db: Session,
+async def bulk_append_events(db: AsyncSession, events: Iterable[Dict[str, Any]]) -> int:
+    """
+    Insert many events with COPY, for batch endpoints, backfills and reconcilers.
+    
+    Rows are written on the session's connection, so they commit or roll
+    back with the caller's transaction. A request handler that records one
+    event per item of a batch (e.g. /characters/claim-batch) can use it to
+    write them in one round trip; handlers recording a single event should
+    keep using append_event.
+    
+    Args:
+        db: Database session
+        events: Dicts with type and optionally actor, object_id, server_id,
+            payload_json and ts (defaults to now)
+        
+    Returns:
+        Number of events written
+    """
+    driver = await _driver_connection(await db.connection())
+    written = 0
+    
+    async with driver.cursor() as cursor:
+        batch = []
+        for event in events:
+            object_id = event.get("object_id")
+            batch.append((
+                event["type"],
+                event.get("actor"),
+                str(object_id) if object_id is not None else None,
+                event.get("server_id"),
+                orjson.dumps(event.get("payload_json") or {}).decode(),
+                event.get("ts") or datetime.now(timezone.utc),
+            ))
+            if len(batch) >= EVENTS_COPY_BATCH_SIZE:
+                written += await _copy_event_rows(cursor, batch)
+                batch = []
+        
+        if batch:
+            written += await _copy_event_rows(cursor, batch)
+    
+    return written
+
+async def _driver_connection(conn: AsyncConnection) -> psycopg.AsyncConnection:
+    """Return the psycopg connection behind a SQLAlchemy connection, for COPY."""
+    raw = await conn.get_raw_connection()
+    return cast(psycopg.AsyncConnection, raw.driver_connection)
+
+async def _copy_event_rows(cursor, rows: List[tuple]) -> int:
+    """Stream one batch of event rows through a single COPY."""
+    async with cursor.copy(EVENTS_COPY_SQL) as copy:
+        for row in rows:
+            await copy.write_row(row)
+    return len(rows)
+
+def _recent_events_query(
+    limit: int,
+    event_type: Optional[str],
+    server_id: Optional[UUID],
+    object_id: Optional[str],
+    fields: Optional[Sequence[str]],
+    before_ts: Optional[datetime],
+    before_seq: Optional[int]
+):
+    """Build the newest-first events SELECT shared by the list helpers."""
+    query = select(Event)
+    
+    if fields:
+        query = query.options(load_only(*(getattr(Event, field) for field in fields)))
+    
+    if event_type:
+        query = query.where(Event.type == event_type)
+    
+    if server_id:
+        query = query.where(Event.server_id == server_id)
+    
+    if object_id:
+        query = query.where(Event.object_id == object_id)
+    
+    # Keyset cursor: resume strictly after the last (ts, seq) already seen
+    if before_ts is not None and before_seq is not None:
+        query = query.where(tuple_(Event.ts, Event.seq) < tuple_(before_ts, before_seq))
+    elif before_ts is not None:
+        query = query.where(Event.ts < before_ts)
+    
+    return query.order_by(desc(Event.ts), desc(Event.seq)).limit(limit)
+
+async def get_recent_events(
+    db: AsyncSession,
     limit: int = 100,
     event_type: Optional[str] = None,
-    server_id: Optional[str] = None,
-    object_id: Optional[str] = None
+    server_id: Optional[UUID] = None,
+    object_id: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    before_ts: Optional[datetime] = None,
+    before_seq: Optional[int] = None
 ) -> List[Event]:
     """
     Get recent events, optionally filtered by type, server, or object.
@@ -82,25 +231,60 @@ def get_recent_events(
         event_type: Filter by event type
         server_id: Filter by server ID
         object_id: Filter by object ID
+        fields: Event attributes to load (all when omitted); the primary key
+            is always loaded
+        before_ts: Only return events older than this timestamp
+        before_seq: Tie-breaker for before_ts; pass the ts and seq of the
+            last event from the previous page
         
     Returns:
         List of Event objects
     """
-    query = db.query(Event)
-    
-    if event_type:
-        query = query.filter(Event.type == event_type)
-    
-    if server_id:
-        query = query.filter(Event.server_id == server_id)
+    result = await db.execute(_recent_events_query(
+        limit, event_type, server_id, object_id, fields, before_ts, before_seq
+    ))
+    return list(result.scalars())
+
+async def stream_recent_events(
+    db: AsyncSession,
+    limit: int = 100,
+    event_type: Optional[str] = None,
+    server_id: Optional[UUID] = None,
+    object_id: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    before_ts: Optional[datetime] = None,
+    before_seq: Optional[int] = None
+) -> AsyncIterator[Event]:
+    """
+    Yield recent events one at a time from a server-side cursor.
     
-    if object_id:
-        query = query.filter(Event.object_id == object_id)
+    Same filters as get_recent_events, but rows are fetched in batches of
+    EVENTS_STREAM_BATCH_SIZE instead of being loaded into a list.
     
-    return query.order_by(desc(Event.ts)).limit(limit).all()
+    Args:
+        db: Database session
+        limit: Maximum number of events to return
+        event_type: Filter by event type
+        server_id: Filter by server ID
+        object_id: Filter by object ID
+        fields: Event attributes to load (all when omitted); the primary key
+            is always loaded
+        before_ts: Only return events older than this timestamp
+        before_seq: Tie-breaker for before_ts; pass the ts and seq of the
+            last event from the previous page
+        
+    Yields:
+        Event objects, newest first
+    """
+    query = _recent_events_query(
+        limit, event_type, server_id, object_id, fields, before_ts, before_seq
+    )
+    result = await db.stream(query.execution_options(yield_per=EVENTS_STREAM_BATCH_SIZE))
+    async for event in result.scalars():
+        yield event
 
 def record_character_event(
-    db: Session,
+    db: AsyncSession,
     character_id: str,
     server_id: str,
     event_type: str,
@@ -128,7 +312,7 @@ def record_character_event(
     )
 
 def record_inventory_event(
-    db: Session,
+    db: AsyncSession,
     character_id: str,
     server_id: str,
     event_type: str,
@@ -164,7 +348,7 @@ def record_inventory_event(
     )
 
 def record_security_event(
-    db: Session,
+    db: AsyncSession,
     event_type: str,
     server_id: Optional[str] = None,
     actor: Optional[str] = None,
@@ -190,3 +374,202 @@ def record_security_event(
         actor=actor,
         payload=payload
     )
+
+async def record_security_event_async(
+    redis: Redis,
+    event_type: str,
+    server_id: Optional[str] = None,
+    actor: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Buffer a security-related event in Redis instead of inserting it inline.
+    
+    The event is written to the database later by drain_events_buffer.
+    
+    Args:
+        redis: Redis client, or a pipeline to queue the command on
+        event_type: Event type identifier
+        server_id: UUID of the server
+        actor: Identifier of the actor
+        payload: Additional data related to the event
+    """
+    await redis.lpush(EVENTS_BUFFER_KEY, orjson.dumps({
+        "type": f"security_{event_type}",
+        "actor": actor,
+        "object_id": None,
+        "server_id": server_id,
+        "payload_json": payload or {},
+        "ts": datetime.now(timezone.utc),
+    }))
+
+async def _write_event_items(engine: AsyncEngine, items: Sequence[str]) -> None:
+    """Write buffered event items with one COPY in one transaction."""
+    async with engine.begin() as conn:
+        driver = await _driver_connection(conn)
+        async with driver.cursor() as cursor:
+            async with cursor.copy(EVENTS_COPY_SQL) as copy:
+                for item in items:
+                    event = orjson.loads(item)
+                    await copy.write_row((
+                        event["type"],
+                        event["actor"],
+                        event["object_id"],
+                        event["server_id"],
+                        orjson.dumps(event["payload_json"]).decode(),
+                        event["ts"],
+                    ))
+
+async def _split_event_items(redis: Redis, engine: AsyncEngine, processing_key: str, items: Sequence[str]) -> int:
+    """
+    Write a failing batch in halves, dead-lettering rows that fail alone.
+    
+    Each half that commits is removed from the processing list straight
+    away, so a later retry does not write it twice. Errors other than
+    _EVENT_ROW_ERRORS propagate and leave the remaining rows in place.
+    
+    Args:
+        redis: Redis client
+        engine: Async SQLAlchemy engine
+        processing_key: Processing list holding the items
+        items: Buffered event items that failed to write together
+        
+    Returns:
+        Number of events written
+    """
+    written = 0
+    middle = len(items) // 2
+    for half in (items[:middle], items[middle:]):
+        if not half:
+            continue
+        try:
+            await _write_event_items(engine, half)
+        except _EVENT_ROW_ERRORS as e:
+            if len(half) > 1:
+                written += await _split_event_items(redis, engine, processing_key, half)
+                continue
+            logger.error(f"Moving buffered event to {EVENTS_DEADLETTER_KEY}: {str(e)}")
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.lpush(EVENTS_DEADLETTER_KEY, half[0])
+                pipe.lrem(processing_key, 1, half[0])
+                await pipe.execute()
+            continue
+        
+        async with redis.pipeline(transaction=True) as pipe:
+            for item in half:
+                pipe.lrem(processing_key, 1, item)
+            await pipe.execute()
+        written += len(half)
+    
+    return written
+
+async def flush_events_buffer(redis: Redis, engine: AsyncEngine, worker_id: str) -> int:
+    """
+    Write one batch of buffered events to the database using COPY.
+    
+    Events are moved from the buffer into the worker's processing list and
+    deleted only after they commit, so a crash mid-flush loses nothing. A
+    batch left there by a failed attempt is retried before new events are
+    taken; after EVENTS_FLUSH_MAX_ATTEMPTS failures it is split to write the
+    good rows and move bad ones to EVENTS_DEADLETTER_KEY.
+    
+    Args:
+        redis: Redis client
+        engine: Async SQLAlchemy engine
+        worker_id: Identifies the calling worker's processing list
+        
+    Returns:
+        Number of events written
+    """
+    processing_key = EVENTS_PROCESSING_KEY.format(worker_id)
+    attempts_key = EVENTS_ATTEMPTS_KEY.format(worker_id)
+    
+    # The client decodes responses, so items are str
+    items = cast(List[str], await redis.lrange(processing_key, 0, -1))
+    if not items:
+        first = await redis.blmove(
+            EVENTS_BUFFER_KEY, processing_key, EVENTS_BUFFER_POLL_SECONDS, "RIGHT", "LEFT"
+        )
+        if first is None:
+            return 0
+        
+        items = [cast(str, first)]
+        count = min(await redis.llen(EVENTS_BUFFER_KEY), EVENTS_BUFFER_BATCH_SIZE - 1)
+        if count:
+            async with redis.pipeline(transaction=False) as pipe:
+                for _ in range(count):
+                    pipe.lmove(EVENTS_BUFFER_KEY, processing_key, "RIGHT", "LEFT")
+                items.extend(item for item in await pipe.execute() if item is not None)
+    
+    try:
+        await _write_event_items(engine, items)
+        written = len(items)
+    except Exception:
+        attempts = await redis.incr(attempts_key)
+        if attempts < EVENTS_FLUSH_MAX_ATTEMPTS:
+            raise
+        logger.warning(f"Buffered event batch of {len(items)} failed {attempts} times, splitting it")
+        written = await _split_event_items(redis, engine, processing_key, items)
+    
+    await redis.delete(processing_key, attempts_key)
+    return written
+
+async def recover_orphaned_events(redis: Redis) -> int:
+    """
+    Return batches held by workers that stopped refreshing their liveness key.
+    
+    Items are moved one at a time, so workers recovering concurrently
+    cannot lose or duplicate an event.
+    
+    Args:
+        redis: Redis client
+        
+    Returns:
+        Number of events moved back to the buffer
+    """
+    recovered = 0
+    for worker_id in await redis.smembers(EVENTS_WORKERS_KEY):
+        if await redis.exists(EVENTS_WORKER_ALIVE_KEY.format(worker_id)):
+            continue
+        
+        processing_key = EVENTS_PROCESSING_KEY.format(worker_id)
+        while await redis.lmove(processing_key, EVENTS_BUFFER_KEY, "LEFT", "RIGHT") is not None:
+            recovered += 1
+        await redis.delete(EVENTS_ATTEMPTS_KEY.format(worker_id))
+        await redis.srem(EVENTS_WORKERS_KEY, worker_id)
+    
+    return recovered
+
+async def drain_events_buffer(redis: Redis, engine: AsyncEngine) -> None:
+    """
+    Background task that continuously flushes the Redis event buffer.
+    
+    Args:
+        redis: Redis client
+        engine: Async SQLAlchemy engine
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    alive_key = EVENTS_WORKER_ALIVE_KEY.format(worker_id)
+    next_recovery = 0.0
+    
+    while True:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(alive_key, 1, ex=EVENTS_WORKER_TTL_SECONDS)
+                pipe.sadd(EVENTS_WORKERS_KEY, worker_id)
+                await pipe.execute()
+            
+            if time.monotonic() >= next_recovery:
+                recovered = await recover_orphaned_events(redis)
+                if recovered:
+                    logger.warning(f"Returned {recovered} events held by stopped workers to the buffer")
+                next_recovery = time.monotonic() + EVENTS_WORKER_TTL_SECONDS
+            
+            written = await flush_events_buffer(redis, engine, worker_id)
+            if written:
+                logger.debug(f"Flushed {written} buffered events")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to flush buffered events: {str(e)}")
+            await asyncio.sleep(EVENTS_BUFFER_POLL_SECONDS)
@@ -5,42 +5,15 @@ This module handles inventory operations and checksums for conflict detection.
 Implements CRDT-like operations for inventory synchronization.
 """
 
-import json
-import hashlib
+import functools
 import logging
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Optional, Tuple
 import copy
 
-logger = logging.getLogger(__name__)
-
-def compute_checksum(data: Union[Dict, List]) -> str:
-    """
-    Compute a stable SHA-256 checksum of inventory data.
-    Uses canonical JSON representation to ensure consistency.
-    
-    Args:
-        data: Dictionary or list to checksum
-        
-    Returns:
-        SHA-256 hexadecimal digest
-    """
-    # Convert to canonical JSON (sorted keys, no whitespace)
-    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
-    
-    # Compute SHA-256
-    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+# Checksums live in utils.checksums; re-exported for existing callers
+from ..utils.checksums import canonical_json, compute_checksum, compute_checksum_bytes, compute_inventory_checksum
 
-def compute_inventory_checksum(slots_json: Dict[str, Any]) -> str:
-    """
-    Compute a stable checksum for inventory slots.
-    
-    Args:
-        slots_json: Inventory slots data
-        
-    Returns:
-        SHA-256 hexadecimal digest
-    """
-    return compute_checksum(slots_json)
+logger = logging.getLogger(__name__)
 
 def apply_ops(slots_json: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -54,7 +27,8 @@ def apply_ops(slots_json: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str
     Returns:
         Updated inventory slots
     """
-    # Create a deep copy to avoid modifying the original
+    # Copy once so the result shares nothing with the caller's inventory;
+    # the path helpers below copy only the dicts along the path they change
     result = copy.deepcopy(slots_json)
     
     # Process each operation
@@ -83,6 +57,11 @@ def apply_ops(slots_json: Dict[str, Any], ops: List[Dict[str, Any]]) -> Dict[str
     
     return result
 
+@functools.lru_cache(maxsize=4096)
+def _split_path(path: str) -> Tuple[str, ...]:
+    """Split a dot-separated path, caching results for paths repeated across ops."""
+    return tuple(path.split('.'))
+
 def get_path_value(data: Dict[str, Any], path: str) -> Any:
     """
     Get a value at a specific path in a nested dictionary.
@@ -97,7 +76,7 @@ def get_path_value(data: Dict[str, Any], path: str) -> Any:
     if not path:
         return data
         
-    parts = path.split('.')
+    parts = _split_path(path)
     current = data
     
     for part in parts:
@@ -113,6 +92,9 @@ def set_path_value(data: Dict[str, Any], path: str, value: Any) -> Dict[str, Any
     Set a value at a specific path in a nested dictionary.
     Creates intermediate dictionaries if they don't exist.
     
+    The input is not modified: only the dictionaries along the path are
+    copied, and the rest of the tree is shared with the result.
+    
     Args:
         data: Dictionary to modify
         path: Dot-separated path (e.g., "slots.backpack.items")
@@ -129,15 +111,17 @@ def set_path_value(data: Dict[str, Any], path: str, value: Any) -> Dict[str, Any
             logger.warning("Cannot replace root with non-dict value")
             return data
     
-    result = copy.deepcopy(data)
-    parts = path.split('.')
+    result = dict(data)
+    parts = _split_path(path)
     current = result
     
-    # Navigate to the parent of the target
-    for i, part in enumerate(parts[:-1]):
-        if part not in current:
-            current[part] = {}
-        current = current[part]
+    # Navigate to the parent of the target, copying each dict on the way
+    for part in parts[:-1]:
+        child = current[part] if part in current else {}
+        if isinstance(child, dict):
+            child = dict(child)
+        current[part] = child
+        current = child
     
     # Set the value
     current[parts[-1]] = value
@@ -147,6 +131,8 @@ def delete_path_value(data: Dict[str, Any], path: str) -> Dict[str, Any]:
     """
     Delete a value at a specific path in a nested dictionary.
     
+    Like set_path_value, only the dictionaries along the path are copied.
+    
     Args:
         data: Dictionary to modify
         path: Dot-separated path (e.g., "slots.backpack.items")
@@ -158,16 +144,20 @@ def delete_path_value(data: Dict[str, Any], path: str) -> Dict[str, Any]:
         logger.warning("Cannot delete root path")
         return data
     
-    result = copy.deepcopy(data)
-    parts = path.split('.')
+    result = dict(data)
+    parts = _split_path(path)
     current = result
     
-    # Navigate to the parent of the target
-    for i, part in enumerate(parts[:-1]):
+    # Navigate to the parent of the target, copying each dict on the way
+    for part in parts[:-1]:
         if part not in current:
             # Path doesn't exist, nothing to delete
-            return result
-        current = current[part]
+            return data
+        child = current[part]
+        if isinstance(child, dict):
+            child = dict(child)
+        current[part] = child
+        current = child
     
     # Delete the value if it exists
     if parts[-1] in current:
@@ -175,6 +165,35 @@ def delete_path_value(data: Dict[str, Any], path: str) -> Dict[str, Any]:
     
     return result
 
+def _pop_path_value(data: Dict[str, Any], path: str) -> Tuple[Dict[str, Any], Any]:
+    """
+    Remove the value at a path and return it, walking the path once.
+    
+    Combines get_path_value and delete_path_value for move operations;
+    like them, only the dictionaries along the path are copied.
+    
+    Returns:
+        (updated data, removed value), or (data, None) if nothing is there
+    """
+    parts = _split_path(path)
+    result = dict(data)
+    current = result
+    
+    # Navigate to the parent of the target, copying each dict on the way
+    for part in parts[:-1]:
+        child = current.get(part)
+        if not isinstance(child, dict):
+            return data, None
+        child = dict(child)
+        current[part] = child
+        current = child
+    
+    value = current.pop(parts[-1], None)
+    if value is None:
+        return data, None
+    
+    return result, value
+
 def apply_add_op(data: Dict[str, Any], path: str, item: Dict[str, Any]) -> Dict[str, Any]:
     """
     Apply an 'add' operation to add an item at the specified path.
@@ -218,7 +237,7 @@ def apply_remove_op(data: Dict[str, Any], path: str, item: Dict[str, Any]) -> Di
     """
     # If item has an id field, we might be removing from a list by id
     if 'id' in item and isinstance(item['id'], str):
-        parent_path = '.'.join(path.split('.')[:-1])
+        parent_path = path.rpartition('.')[0]
         parent = get_path_value(data, parent_path)
         
         if isinstance(parent, list):
@@ -246,15 +265,12 @@ def apply_move_op(data: Dict[str, Any], path: str, item: Dict[str, Any]) -> Dict
         logger.warning("Move operation missing from_path")
         return data
     
-    # Get the item to move
-    move_item = get_path_value(data, from_path)
+    # Take the item out of the source in a single walk
+    intermediate, move_item = _pop_path_value(data, from_path)
     if move_item is None:
         logger.warning(f"Item at {from_path} not found for move operation")
         return data
     
-    # Remove from source
-    intermediate = delete_path_value(data, from_path)
-    
     # Add to destination
     return apply_add_op(intermediate, path, move_item)
 
@@ -283,7 +299,12 @@ def apply_update_op(data: Dict[str, Any], path: str, item: Dict[str, Any]) -> Di
         # Replace value
         return set_path_value(data, path, item)
 
-def detect_conflicts(old_slots: Dict[str, Any], new_slots: Dict[str, Any]) -> bool:
+def detect_conflicts(
+    old_slots: Dict[str, Any],
+    new_slots: Dict[str, Any],
+    old_checksum: Optional[str] = None,
+    new_checksum: Optional[str] = None
+) -> bool:
     """
     Detect potential conflicts between two inventory states.
     This is a simple implementation that checks for key differences.
@@ -291,18 +312,28 @@ def detect_conflicts(old_slots: Dict[str, Any], new_slots: Dict[str, Any]) -> bo
     Args:
         old_slots: Previous inventory state
         new_slots: New inventory state
+        old_checksum: Stored checksum of old_slots, if known
+        new_checksum: Checksum of new_slots, if known
         
     Returns:
         True if potential conflicts detected, False otherwise
     """
+    # Equal checksums mean identical inventories, so nothing was removed
+    if old_checksum is not None and old_checksum == new_checksum:
+        return False
+    
     # For MVP, just check if any keys were removed
-    if isinstance(old_slots, dict) and isinstance(new_slots, dict):
-        for key in old_slots:
-            if key not in new_slots:
-                return True
-                
-            if isinstance(old_slots[key], dict) and isinstance(new_slots[key], dict):
-                if detect_conflicts(old_slots[key], new_slots[key]):
-                    return True
+    if not (isinstance(old_slots, dict) and isinstance(new_slots, dict)):
+        return False
+    
+    # Set difference on the key views runs in C
+    if old_slots.keys() - new_slots.keys():
+        return True
+    
+    # Recurse only into keys whose values are dicts on both sides
+    for key in old_slots.keys() & new_slots.keys():
+        old_value, new_value = old_slots[key], new_slots[key]
+        if isinstance(old_value, dict) and isinstance(new_value, dict) and detect_conflicts(old_value, new_value):
+            return True
     
     return False
@@ -0,0 +1,95 @@
+"""
+Servers service for DayZ HiveAPI.
+
+This module tracks server presence. Logins record ``last_seen_at`` in Redis
+and a background task periodically writes the collected timestamps to the
+servers table in a single bulk UPDATE, instead of one UPDATE per login.
+"""
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Redis hash of server_id -> last seen epoch seconds awaiting flush
+LAST_SEEN_KEY = "server:lastseen"
+
+# Seconds between flushes of LAST_SEEN_KEY to the database
+LAST_SEEN_FLUSH_SECONDS = 30
+
+# Bulk UPDATE; never moves last_seen_at backwards
+_BULK_UPDATE_SQL = text("""
+    UPDATE servers
+    SET last_seen_at = GREATEST(servers.last_seen_at, to_timestamp(t.seen))
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:seen AS double precision[])) AS t(id, seen)
+    WHERE servers.id = t.id
+""")
+
+async def touch_server_last_seen(redis: Redis, server_id: UUID) -> None:
+    """
+    Record that a server was seen now.
+    
+    Args:
+        redis: Redis client, or a pipeline to queue the command on
+        server_id: UUID of the server
+    """
+    await redis.hset(LAST_SEEN_KEY, str(server_id), time.time())
+
+async def flush_server_last_seen(redis: Redis, engine: AsyncEngine) -> int:
+    """
+    Write pending last-seen timestamps to the database.
+    
+    Args:
+        redis: Redis client
+        engine: Async SQLAlchemy engine
+        
+    Returns:
+        Number of servers updated
+    """
+    # Read and clear atomically so concurrent logins land in the next flush
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hgetall(LAST_SEEN_KEY)
+        pipe.delete(LAST_SEEN_KEY)
+        pending, _ = await pipe.execute()
+    
+    if not pending:
+        return 0
+    
+    ids = list(pending.keys())
+    seen = [float(pending[server_id]) for server_id in ids]
+    
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(_BULK_UPDATE_SQL, {"ids": ids, "seen": seen})
+    except Exception:
+        # Put the timestamps back (without clobbering newer ones) for the next flush
+        for server_id, ts in pending.items():
+            await redis.hsetnx(LAST_SEEN_KEY, server_id, ts)
+        raise
+    
+    return len(ids)
+
+async def sync_server_last_seen(redis: Redis, engine: AsyncEngine) -> None:
+    """
+    Background task that flushes last-seen timestamps every LAST_SEEN_FLUSH_SECONDS.
+    
+    Args:
+        redis: Redis client
+        engine: Async SQLAlchemy engine
+    """
+    while True:
+        await asyncio.sleep(LAST_SEEN_FLUSH_SECONDS)
+        try:
+            updated = await flush_server_last_seen(redis, engine)
+            if updated:
+                logger.debug(f"Flushed last_seen_at for {updated} servers")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to flush server last_seen_at: {str(e)}")
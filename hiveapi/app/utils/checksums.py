@@ -7,8 +7,11 @@ which are used for detecting conflicts and ensuring data integrity.
 
 import json
 import hashlib
+import logging
 from typing import Union, Dict, List, Any
 
+logger = logging.getLogger(__name__)
+
 def compute_checksum(data: Union[Dict, List, Any]) -> str:
     """
     Compute a stable SHA-256 checksum of data.
@@ -24,11 +27,43 @@ def compute_checksum(data: Union[Dict, List, Any]) -> str:
         >>> compute_checksum({"b": 2, "a": 1})
         >>> compute_checksum({"a": 1, "b": 2})  # Same result as above
     """
-    # Convert to canonical JSON (sorted keys, no whitespace)
-    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return compute_checksum_bytes(canonical_json(data))
+
+def canonical_json(data: Union[Dict, List, Any]) -> bytes:
+    """
+    Serialize data to canonical JSON (sorted keys, no whitespace, ASCII).
+    
+    Game servers compute the same checksums, so these bytes are a wire
+    format: non-ASCII text is escaped as \\uXXXX, floats use Python's repr and
+    integers are written in full. Faster encoders such as orjson differ on
+    all of these and must not be used here.
+    
+    Args:
+        data: JSON-serializable data
+        
+    Returns:
+        Canonical JSON bytes, the input to compute_checksum_bytes
     
-    # Compute SHA-256
-    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    Raises:
+        TypeError: If data contains a value JSON cannot represent
+        ValueError: If data contains a circular reference
+    """
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('ascii')
+
+def compute_checksum_bytes(canonical: bytes) -> str:
+    """
+    Compute the SHA-256 checksum of already-canonical JSON bytes.
+    
+    Lets callers that also need the serialized form (e.g. to store it)
+    serialize once with canonical_json.
+    
+    Args:
+        canonical: Output of canonical_json
+        
+    Returns:
+        SHA-256 hexadecimal digest
+    """
+    return hashlib.sha256(canonical).hexdigest()
 
 def compute_inventory_checksum(slots_json: Dict[str, Any]) -> str:
     """
@@ -42,3 +77,33 @@ def compute_inventory_checksum(slots_json: Dict[str, Any]) -> str:
         SHA-256 hexadecimal digest
     """
     return compute_checksum(slots_json)
+
+def _cpu_has_sha_ni() -> bool:
+    """Return True if /proc/cpuinfo advertises the x86 SHA extensions."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            return any(line.startswith("flags") and "sha_ni" in line.split() for line in f)
+    except OSError:
+        return False
+
+def check_sha256_backend() -> bool:
+    """
+    Check that hashlib's SHA-256 is provided by OpenSSL.
+    
+    OpenSSL uses the CPU's SHA extensions when available; CPython's
+    built-in fallback does not. Checksums are identical either way, so this
+    only logs a warning when a SHA-capable CPU is running the fallback.
+    
+    Returns:
+        True if SHA-256 is backed by OpenSSL
+    """
+    try:
+        import _hashlib
+        openssl = hasattr(_hashlib, "openssl_sha256")
+    except ImportError:
+        openssl = False
+    
+    if not openssl and _cpu_has_sha_ni():
+        logger.warning("CPU supports SHA extensions but hashlib is not linked against OpenSSL; checksums use the slower built-in SHA-256")
+    
+    return openssl
@@ -7,9 +7,12 @@ processing of requests in distributed systems.
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 from typing import Optional
 
@@ -18,7 +21,21 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
-async def ensure_idempotent(key: str, server_id: str, redis: Redis, db: Session) -> bool:
+# Expired keys deleted per transaction by cleanup_expired_keys
+CLEANUP_BATCH_SIZE = 10000
+
+# Delete one batch of expired keys; bounded so each transaction holds its
+# row locks briefly and never blocks inserts for long
+_DELETE_EXPIRED_KEYS_SQL = text("""
+    DELETE FROM idempotency_keys
+    WHERE key IN (
+        SELECT key FROM idempotency_keys
+        WHERE created_at < :expiration
+        LIMIT :batch_size
+    )
+""")
+
+async def ensure_idempotent(key: str, server_id: UUID, redis: Redis, db: AsyncSession) -> bool:
     """
     Ensure idempotent processing by checking if the key has already been used.
     If the key is new, it's stored in Redis with TTL and in the database for persistence.
@@ -42,45 +59,39 @@ async def ensure_idempotent(key: str, server_id: str, redis: Redis, db: Session)
     # Normalize key for storage
     redis_key = f"idem:{key}"
     
-    # Check if key exists in Redis (fast path)
-    if await redis.exists(redis_key):
+    # Claim the key in Redis with SET NX (fast path); one atomic round trip,
+    # so two concurrent requests cannot both see the key as new
+    claimed = await redis.set(
+        redis_key,
+        str(server_id),
+        ex=settings.IDEMPOTENCY_TTL_SECONDS,
+        nx=True
+    )
+    if not claimed:
         logger.debug(f"Idempotency key already exists in Redis: {key}")
         return False
     
-    # Check if key exists in database (fallback)
-    db_key = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
-    if db_key:
-        # Key exists in DB but not in Redis, restore it to Redis
-        logger.debug(f"Idempotency key found in DB but not Redis, restoring: {key}")
-        await redis.set(
-            redis_key, 
-            server_id,
-            ex=settings.IDEMPOTENCY_TTL_SECONDS
-        )
-        return False
-    
-    # Key is new, store it in Redis with TTL
     try:
-        await redis.set(
-            redis_key,
-            server_id,
-            ex=settings.IDEMPOTENCY_TTL_SECONDS
-        )
+        # Store in database for persistence; the insert doubles as the
+        # database fallback check, so a new key costs no extra lookup
+        stored = (await db.execute(
+            pg_insert(IdempotencyKey)
+            .values(key=key, server_id=server_id)
+            .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+            .returning(IdempotencyKey.key)
+        )).scalar_one_or_none()
+        await db.commit()
         
-        # Store in database for persistence
-        db_key = IdempotencyKey(
-            key=key,
-            server_id=server_id,
-            created_at=datetime.utcnow()
-        )
-        db.add(db_key)
-        db.commit()
+        if stored is None:
+            # Key exists in DB but not in Redis; the claim above restored it
+            logger.debug(f"Idempotency key found in DB but not Redis, restored: {key}")
+            return False
         
         logger.debug(f"New idempotency key stored: {key}")
         return True
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database error storing idempotency key: {str(e)}")
         # If DB storage fails but Redis succeeded, we still consider it stored
         return True
@@ -90,7 +101,7 @@ async def ensure_idempotent(key: str, server_id: str, redis: Redis, db: Session)
         await redis.delete(redis_key)
         return False
 
-async def check_idempotent(key: str, redis: Redis, db: Session) -> Optional[str]:
+async def check_idempotent(key: str, redis: Redis, db: AsyncSession) -> Optional[str]:
     """
     Check if an idempotency key exists without storing it.
     
@@ -110,19 +121,19 @@ async def check_idempotent(key: str, redis: Redis, db: Session) -> Optional[str]
         return server_id
     
     # Check database as fallback
-    db_key = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    db_key = await db.get(IdempotencyKey, key)
     if db_key:
         # Restore to Redis
         await redis.set(
             redis_key,
-            db_key.server_id,
+            str(db_key.server_id),
             ex=settings.IDEMPOTENCY_TTL_SECONDS
         )
-        return db_key.server_id
+        return str(db_key.server_id)
     
     return None
 
-async def remove_idempotency_key(key: str, redis: Redis, db: Session) -> bool:
+async def remove_idempotency_key(key: str, redis: Redis, db: AsyncSession) -> bool:
     """
     Remove an idempotency key from both Redis and database.
     Useful for cleaning up after errors or for testing.
@@ -139,28 +150,31 @@ async def remove_idempotency_key(key: str, redis: Redis, db: Session) -> bool:
     removed = False
     
     # Remove from Redis
-    if await redis.exists(redis_key):
-        await redis.delete(redis_key)
+    if await redis.delete(redis_key):
         removed = True
     
     # Remove from database
     try:
-        db_key = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        db_key = await db.get(IdempotencyKey, key)
         if db_key:
-            db.delete(db_key)
-            db.commit()
+            await db.delete(db_key)
+            await db.commit()
             removed = True
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database error removing idempotency key: {str(e)}")
     
     return removed
 
-async def cleanup_expired_keys(redis: Redis, db: Session) -> int:
+async def cleanup_expired_keys(redis: Redis, db: AsyncSession) -> int:
     """
     Cleanup expired idempotency keys from the database.
     This is a maintenance function that should be called periodically.
     
+    Keys are deleted in batches of CLEANUP_BATCH_SIZE, one transaction
+    each, with synchronous_commit off: losing the last batch in a crash
+    only means it is deleted again on the next run.
+    
     Args:
         redis: Redis client
         db: Database session
@@ -170,16 +184,22 @@ async def cleanup_expired_keys(redis: Redis, db: Session) -> int:
     """
     try:
         # Calculate expiration threshold
-        expiration = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
-        
-        # Delete expired keys
-        result = db.query(IdempotencyKey).filter(
-            IdempotencyKey.created_at < expiration
-        ).delete()
+        expiration = datetime.now(timezone.utc) - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
         
-        db.commit()
-        return result
+        # Delete expired keys batch by batch
+        removed = 0
+        while True:
+            await db.execute(text("SET LOCAL synchronous_commit = off"))
+            result = await db.execute(
+                _DELETE_EXPIRED_KEYS_SQL,
+                {"expiration": expiration, "batch_size": CLEANUP_BATCH_SIZE}
+            )
+            await db.commit()
+            
+            removed += result.rowcount
+            if result.rowcount < CLEANUP_BATCH_SIZE:
+                return removed
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database error cleaning up expired idempotency keys: {str(e)}")
         return 0
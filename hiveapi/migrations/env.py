@@ -9,7 +9,7 @@ import os
 from logging.config import fileConfig
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, pool, text
 
 # Import Base from models and settings for DB_URL
 from app.db.models import Base
@@ -85,10 +85,14 @@ def run_migrations_online() -> None:
     with connectable.connect() as connection:
         # For PostgreSQL, create extensions if needed
         if is_postgresql:
+            # Commit or roll back right away so the migrations below start
+            # in a fresh transaction either way
             try:
-                connection.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pgcrypto"))
+                connection.commit()
                 logger.info("Ensured pgcrypto extension is available")
             except Exception as e:
+                connection.rollback()
                 logger.warning(f"Could not create pgcrypto extension: {e}")
         
         context.configure(
@@ -0,0 +1,41 @@
+"""
+Notify listeners when events are inserted.
+
+Adds a trigger on the events table that publishes the new event ID on the
+``events_channel`` NOTIFY channel, consumed by the admin SSE stream.
+
+Revision ID: 0002_events_notify
+Revises: 0001_initial
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '0002_events_notify'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Trigger function publishing the new event ID
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_event_insert() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('events_channel', NEW.id::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER events_notify
+        AFTER INSERT ON events
+        FOR EACH ROW EXECUTE FUNCTION notify_event_insert()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS events_notify ON events")
+    op.execute("DROP FUNCTION IF EXISTS notify_event_insert()")
@@ -0,0 +1,44 @@
+"""
+Composite indexes for the events access pattern.
+
+Replaces the single-column indexes on events with composites that match the
+admin queries (optional type/server/object filter ordered by ts), plus a BRIN
+index on ts for pure time-range scans.
+
+Revision ID: 0003_events_composite_indexes
+Revises: 0002_events_notify
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '0003_events_composite_indexes'
+down_revision = '0002_events_notify'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_events_type', table_name='events')
+    op.drop_index('ix_events_object_id', table_name='events')
+    op.drop_index('ix_events_server_id', table_name='events')
+    op.drop_index('ix_events_ts', table_name='events')
+
+    op.create_index('ix_events_server_ts', 'events', ['server_id', 'ts'])
+    op.create_index('ix_events_type_ts', 'events', ['type', 'ts'])
+    op.create_index('ix_events_object_ts', 'events', ['object_id', 'ts'])
+    op.create_index('ix_events_ts_brin', 'events', ['ts'], postgresql_using='brin')
+
+
+def downgrade():
+    op.drop_index('ix_events_ts_brin', table_name='events')
+    op.drop_index('ix_events_object_ts', table_name='events')
+    op.drop_index('ix_events_type_ts', table_name='events')
+    op.drop_index('ix_events_server_ts', table_name='events')
+
+    op.create_index('ix_events_type', 'events', ['type'])
+    op.create_index('ix_events_object_id', 'events', ['object_id'])
+    op.create_index('ix_events_server_id', 'events', ['server_id'])
+    op.create_index('ix_events_ts', 'events', ['ts'])
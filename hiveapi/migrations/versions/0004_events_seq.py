@@ -0,0 +1,44 @@
+"""
+Add a monotonic seq cursor to events.
+
+Adds ``events.seq`` (BIGINT backed by the ``events_seq`` sequence) so readers
+can page with ``WHERE seq > :last_seq`` instead of resolving UUIDs to
+timestamps. Existing rows are numbered in ts order.
+
+Revision ID: 0004_events_seq
+Revises: 0003_events_composite_indexes
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0004_events_seq'
+down_revision = '0003_events_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE events_seq")
+    op.add_column('events', sa.Column('seq', sa.BigInteger(), nullable=True))
+
+    # Backfill existing rows in timestamp order
+    op.execute("""
+        UPDATE events SET seq = ordered.rn
+        FROM (SELECT id, row_number() OVER (ORDER BY ts, id) AS rn FROM events) AS ordered
+        WHERE events.id = ordered.id
+    """)
+    op.execute("SELECT setval('events_seq', COALESCE((SELECT max(seq) FROM events), 0) + 1, false)")
+
+    op.alter_column('events', 'seq', nullable=False, server_default=sa.text("nextval('events_seq')"))
+    op.execute("ALTER SEQUENCE events_seq OWNED BY events.seq")
+    op.create_unique_constraint('uq_events_seq', 'events', ['seq'])
+
+
+def downgrade():
+    op.drop_constraint('uq_events_seq', 'events', type_='unique')
+    op.drop_column('events', 'seq')
+    op.execute("DROP SEQUENCE IF EXISTS events_seq")
@@ -0,0 +1,94 @@
+"""
+Store primary and foreign keys as native uuid.
+
+Converts every VARCHAR id column to ``uuid`` and moves id generation into
+the database with ``DEFAULT gen_random_uuid()`` (built in since PostgreSQL
+13). Foreign keys are dropped while the referenced columns change type and
+are recreated afterwards.
+
+Revision ID: 0005_native_uuid_keys
+Revises: 0004_events_seq
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic
+revision = '0005_native_uuid_keys'
+down_revision = '0004_events_seq'
+branch_labels = None
+depends_on = None
+
+# Tables whose primary key is a generated id
+PK_TABLES = ['tenants', 'clusters', 'servers', 'players', 'characters', 'events', 'move_tickets']
+
+# (table, column, referenced table, ondelete) for every foreign key
+FOREIGN_KEYS = [
+    ('clusters', 'tenant_id', 'tenants', 'CASCADE'),
+    ('servers', 'cluster_id', 'clusters', 'CASCADE'),
+    ('characters', 'player_id', 'players', 'CASCADE'),
+    ('characters', 'cluster_id', 'clusters', 'CASCADE'),
+    ('characters', 'owned_by_server', 'servers', 'SET NULL'),
+    ('events', 'server_id', 'servers', 'SET NULL'),
+    ('idempotency_keys', 'server_id', 'servers', 'CASCADE'),
+    ('move_tickets', 'character_id', 'characters', 'CASCADE'),
+    ('move_tickets', 'source_server_id', 'servers', 'SET NULL'),
+    ('move_tickets', 'target_server_id', 'servers', 'SET NULL'),
+]
+
+
+def _drop_foreign_keys():
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+
+
+def _create_foreign_keys():
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(
+            f'{table}_{column}_fkey', table, referent, [column], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    _drop_foreign_keys()
+
+    for table in PK_TABLES:
+        op.alter_column(
+            table, 'id',
+            type_=UUID(as_uuid=True),
+            postgresql_using='id::uuid',
+            server_default=sa.text('gen_random_uuid()'),
+        )
+
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.alter_column(
+            table, column,
+            type_=UUID(as_uuid=True),
+            postgresql_using=f'{column}::uuid',
+        )
+
+    _create_foreign_keys()
+
+
+def downgrade():
+    _drop_foreign_keys()
+
+    for table, column, _, _ in FOREIGN_KEYS:
+        op.alter_column(
+            table, column,
+            type_=sa.String(),
+            postgresql_using=f'{column}::text',
+        )
+
+    for table in PK_TABLES:
+        op.alter_column(
+            table, 'id',
+            type_=sa.String(),
+            postgresql_using='id::text',
+            server_default=None,
+        )
+
+    _create_foreign_keys()
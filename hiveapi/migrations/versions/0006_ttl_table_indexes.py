@@ -0,0 +1,44 @@
+"""
+Cheaper indexes for the TTL-style tables.
+
+Replaces the B-tree on idempotency_keys.created_at with a BRIN index (rows
+arrive in created_at order, so block ranges are tight and the index stays a
+few pages), and replaces the low-selectivity move_tickets status index with a
+partial index covering only issued tickets.
+
+Revision ID: 0006_ttl_table_indexes
+Revises: 0005_native_uuid_keys
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0006_ttl_table_indexes'
+down_revision = '0005_native_uuid_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.create_index(
+        'ix_idempotency_keys_created_at_brin', 'idempotency_keys', ['created_at'],
+        postgresql_using='brin',
+    )
+
+    op.drop_index('ix_move_tickets_status', table_name='move_tickets')
+    op.create_index(
+        'ix_move_tickets_active', 'move_tickets', ['character_id'],
+        postgresql_where=sa.text("status = 'issued'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_move_tickets_active', table_name='move_tickets')
+    op.create_index('ix_move_tickets_status', 'move_tickets', ['status'])
+
+    op.drop_index('ix_idempotency_keys_created_at_brin', table_name='idempotency_keys')
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys', ['created_at'])
@@ -0,0 +1,52 @@
+"""
+Store timestamps as timestamptz.
+
+The application now writes timezone-aware UTC datetimes. Existing naive
+values are UTC by convention and are converted with AT TIME ZONE 'UTC'.
+
+Revision ID: 0007_timestamptz
+Revises: 0006_ttl_table_indexes
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0007_timestamptz'
+down_revision = '0006_ttl_table_indexes'
+branch_labels = None
+depends_on = None
+
+# Every timestamp column, by table
+TIMESTAMP_COLUMNS = {
+    'tenants': ['created_at', 'updated_at'],
+    'clusters': ['created_at', 'updated_at'],
+    'servers': ['created_at', 'last_seen_at'],
+    'players': ['created_at', 'last_seen_at'],
+    'characters': ['created_at', 'last_seen_at'],
+    'events': ['ts'],
+    'idempotency_keys': ['created_at'],
+    'move_tickets': ['expires_at', 'created_at', 'redeemed_at'],
+}
+
+
+def upgrade():
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=sa.DateTime(timezone=True),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            )
+
+
+def downgrade():
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=sa.DateTime(),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            )
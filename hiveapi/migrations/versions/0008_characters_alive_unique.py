@@ -0,0 +1,35 @@
+"""
+One alive character per player and cluster.
+
+Adds a partial unique index on characters (player_id, cluster_id) for
+alive characters. claim_character upserts against it with
+ON CONFLICT ... WHERE life_state = 'alive'. Creation fails if a player
+already has more than one alive character in a cluster; resolve those rows
+before upgrading.
+
+Revision ID: 0008_characters_alive_unique
+Revises: 0007_timestamptz
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0008_characters_alive_unique'
+down_revision = '0007_timestamptz'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'uq_characters_alive', 'characters', ['player_id', 'cluster_id'],
+        unique=True,
+        postgresql_where=sa.text("life_state = 'alive'"),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_characters_alive', table_name='characters')
@@ -0,0 +1,31 @@
+"""
+Index events for keyset pagination.
+
+Adds events (ts DESC, seq DESC) so paging the events listing with a
+(ts, seq) < (before_ts, before_seq) cursor is an index range scan that
+stays O(limit) however deep the caller walks.
+
+Revision ID: 0009_events_ts_seq_index
+Revises: 0008_characters_alive_unique
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0009_events_ts_seq_index'
+down_revision = '0008_characters_alive_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_events_ts_seq', 'events', [sa.text('ts DESC'), sa.text('seq DESC')],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_events_ts_seq', table_name='events')
@@ -0,0 +1,37 @@
+"""
+Cover idempotency key lookups with the primary key index.
+
+Rebuilds the idempotency_keys primary key as PRIMARY KEY (key) INCLUDE
+(server_id, created_at), so the per-request lookup by key can be answered
+by an index-only scan without a heap fetch.
+
+Revision ID: 0010_idempotency_covering_pkey
+Revises: 0009_events_ts_seq_index
+Create Date: 2025-09-12
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '0010_idempotency_covering_pkey'
+down_revision = '0009_events_ts_seq_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        'ALTER TABLE idempotency_keys '
+        'DROP CONSTRAINT idempotency_keys_pkey, '
+        'ADD CONSTRAINT idempotency_keys_pkey PRIMARY KEY (key) INCLUDE (server_id, created_at)'
+    )
+
+
+def downgrade():
+    op.execute(
+        'ALTER TABLE idempotency_keys '
+        'DROP CONSTRAINT idempotency_keys_pkey, '
+        'ADD CONSTRAINT idempotency_keys_pkey PRIMARY KEY (key)'
+    )
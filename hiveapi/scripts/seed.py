@@ -11,13 +11,19 @@ This script creates initial data for testing and development:
 
 Usage:
     python -m scripts.seed
+
+Set SEED_RSA_KEY_SIZE to change the demo server key size (default 2048).
+Smaller keys generate faster but are for local fixtures only; real server
+keys are provisioned outside this script and must be at least 2048 bits.
 """
 
+import functools
 import os
 import sys
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path so we can import app modules
 sys.path.append(str(Path(__file__).parent.parent))
@@ -29,14 +35,59 @@ from cryptography.hazmat.primitives import serialization
 from app.deps import SessionLocal
 from app.db.models import Tenant, Cluster, Server, Player, Character, Event
 
+# Modulus size for a newly generated demo server key
+SEED_RSA_KEY_SIZE = int(os.environ.get("SEED_RSA_KEY_SIZE", "2048"))
+
+
+def write_private_key(path: Path, data: bytes):
+    """
+    Write a private key PEM readable only by the current user.
+    
+    Args:
+        path: File to create or truncate
+        data: PEM-encoded private key
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
 
-def generate_rsa_keypair():
-    """Generate RSA keypair for testing."""
+@functools.lru_cache(maxsize=1)
+def generate_rsa_keypair(cache_path: Optional[Path] = None):
+    """
+    Generate RSA keypair for testing.
+    
+    The result is memoized, so repeated calls in one process with the same
+    cache_path return the same immutable PEM bytes without touching disk.
+    
+    Args:
+        cache_path: Private key PEM to reuse if it exists; a newly generated
+            key is written there so later seed runs skip key generation
+    
+    Returns:
+        Tuple of (private_pem, public_pem) as PEM-encoded bytes
+    """
+    private_key = None
+    if cache_path is not None:
+        # The cached key was written by this script, so skip the RSA
+        # consistency checks, which cost about as much as generating a key
+        try:
+            private_key = serialization.load_pem_private_key(
+                cache_path.read_bytes(),
+                password=None,
+                unsafe_skip_rsa_key_validation=True
+            )
+        except (FileNotFoundError, ValueError):
+            pass
+    
     # Generate private key
-    private_key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=2048
-    )
+    if private_key is None:
+        private_key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=SEED_RSA_KEY_SIZE
+        )
     
     # Get public key
     public_key = private_key.public_key()
@@ -46,23 +97,33 @@ def generate_rsa_keypair():
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
         encryption_algorithm=serialization.NoEncryption()
-    ).decode('utf-8')
+    )
     
     # Serialize public key to PEM format
     public_pem = public_key.public_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo
-    ).decode('utf-8')
+    )
+    
+    if cache_path is not None and not cache_path.exists():
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_private_key(cache_path, private_pem)
     
     return private_pem, public_pem
 
 
 def seed_database(db: Session):
     """Seed the database with initial data."""
-    print("Seeding database...")
+    # Progress lines, printed together once the data is committed
+    log = ["Seeding database..."]
+    
+    keys_dir = Path(__file__).parent.parent / "keys" / "servers"
+    
+    # One timestamp for every row created in this run
+    now = datetime.now(timezone.utc)
     
-    # Generate RSA keypair for server
-    private_pem, public_pem = generate_rsa_keypair()
+    # Generate RSA keypair for server, reusing the demo key from earlier runs
+    private_pem, public_pem = generate_rsa_keypair(keys_dir / "demo_private.pem")
     
     # Create tenant
     tenant_id = str(uuid.uuid4())
@@ -72,9 +133,7 @@ def seed_database(db: Session):
         owner_id="admin",
         settings_json={"description": "Demo tenant for development"}
     )
-    db.add(tenant)
-    db.flush()
-    print(f"Created tenant: {tenant_id}")
+    log.append(f"Created tenant: {tenant_id}")
     
     # Create cluster
     cluster_id = str(uuid.uuid4())
@@ -84,9 +143,7 @@ def seed_database(db: Session):
         name="Demo Cluster",
         policy_json={"description": "Demo cluster for development"}
     )
-    db.add(cluster)
-    db.flush()
-    print(f"Created cluster: {cluster_id}")
+    log.append(f"Created cluster: {cluster_id}")
     
     # Create server
     server_id = str(uuid.uuid4())
@@ -95,25 +152,19 @@ def seed_database(db: Session):
         cluster_id=cluster_id,
         name="Demo Server",
         host_fingerprint="demo:fingerprint:123",
-        public_key_pem=public_pem,
+        public_key_pem=public_pem.decode('ascii'),
         status="active",
-        created_at=datetime.utcnow()
+        created_at=now
     )
-    db.add(server)
-    db.flush()
-    print(f"Created server: {server_id}")
+    log.append(f"Created server: {server_id}")
     
-    # Save private key to file for testing
-    keys_dir = Path(__file__).parent.parent / "keys" / "servers"
+    # Save private key to file for testing; the public key is only kept on
+    # the server row
     keys_dir.mkdir(parents=True, exist_ok=True)
     
-    with open(keys_dir / f"{server_id}_private.pem", "w") as f:
-        f.write(private_pem)
-    
-    with open(keys_dir / f"{server_id}_public.pem", "w") as f:
-        f.write(public_pem)
+    write_private_key(keys_dir / f"{server_id}_private.pem", private_pem)
     
-    print(f"Saved server keys to {keys_dir}")
+    log.append(f"Saved server private key to {keys_dir}")
     
     # Create player
     player_id = str(uuid.uuid4())
@@ -123,9 +174,7 @@ def seed_database(db: Session):
         reputation=0,
         meta={"created_by": "seed.py"}
     )
-    db.add(player)
-    db.flush()
-    print(f"Created player: {player_id}")
+    log.append(f"Created player: {player_id}")
     
     # Create character
     character_id = str(uuid.uuid4())
@@ -137,11 +186,9 @@ def seed_database(db: Session):
         life_state="alive",
         position={"x": 100, "y": 50, "z": 200},
         stats_json={"health": 100, "blood": 5000, "water": 100, "energy": 100},
-        last_seen_at=datetime.utcnow()
+        last_seen_at=now
     )
-    db.add(character)
-    db.flush()
-    print(f"Created character: {character_id}")
+    log.append(f"Created character: {character_id}")
     
     # Create event for character creation
     event_id = str(uuid.uuid4())
@@ -153,22 +200,25 @@ def seed_database(db: Session):
         server_id=server_id,
         payload_json={"method": "seed", "position": character.position}
     )
-    db.add(event)
-    db.flush()
-    print(f"Created event: {event_id}")
-    
-    # Commit all changes
-    db.commit()
-    
-    # Print summary
-    print("\nSeed data created successfully:")
-    print(f"  Tenant ID:    {tenant_id}")
-    print(f"  Cluster ID:   {cluster_id}")
-    print(f"  Server ID:    {server_id}")
-    print(f"  Player ID:    {player_id}")
-    print(f"  Character ID: {character_id}")
-    print("\nFor testing, you can use:")
-    print(f"  Server Login: curl -X POST http://localhost:8000/v1/auth/server-login -H \"Content-Type: application/json\" -d '{{\"server_id\":\"{server_id}\",\"proof\":\"<base64_signature>\"}}'\n")
+    log.append(f"Created event: {event_id}")
+    
+    # Insert everything in one transaction and one flush; ids are assigned
+    # up front and the unit of work orders parents before children by
+    # foreign key
+    with db.begin():
+        db.add_all([tenant, cluster, server, player, character, event])
+    
+    # Summary
+    log.append("\nSeed data created successfully:")
+    log.append(f"  Tenant ID:    {tenant_id}")
+    log.append(f"  Cluster ID:   {cluster_id}")
+    log.append(f"  Server ID:    {server_id}")
+    log.append(f"  Player ID:    {player_id}")
+    log.append(f"  Character ID: {character_id}")
+    log.append("\nFor testing, you can use:")
+    log.append(f"  Server Login: curl -X POST http://localhost:8000/v1/auth/server-login -H \"Content-Type: application/json\" -d '{{\"server_id\":\"{server_id}\",\"proof\":\"<base64_signature>\"}}'\n")
+    
+    print("\n".join(log))
 
 
 def main():
@@ -0,0 +1,30 @@
+"""
+Tests for the canonical JSON checksum format.
+
+Game servers compute the same checksums, so these pin the exact bytes of
+json.dumps(sort_keys=True, separators=(',', ':')) for inputs where other
+JSON encoders differ.
+"""
+
+from app.utils.checksums import canonical_json, compute_checksum, compute_inventory_checksum
+
+def test_non_ascii_text_is_escaped():
+    inventory = {"name": "Café", "slot": {"b": 1, "a": "中"}}
+
+    assert canonical_json(inventory) == b'{"name":"Caf\\u00e9","slot":{"a":"\\u4e2d","b":1}}'
+    assert compute_inventory_checksum(inventory) == "e9bca9163692f9b980620e2e20bf3f8beb9ed68fb63ea81fc5f2730746bc11f2"
+
+def test_exponent_floats_use_python_repr():
+    inventory = {"weight": 1e16, "decay": 1e-07, "wear": 1.5e-05}
+
+    assert canonical_json(inventory) == b'{"decay":1e-07,"wear":1.5e-05,"weight":1e+16}'
+    assert compute_inventory_checksum(inventory) == "2ce4e9695329cd0547a4390f81bbe4bdd8ccd9d329f35e02bc4b4554b18d7396"
+
+def test_big_integers_are_written_in_full():
+    inventory = {"count": 2**70, "neg": -2**64}
+
+    assert canonical_json(inventory) == b'{"count":1180591620717411303424,"neg":-18446744073709551616}'
+    assert compute_inventory_checksum(inventory) == "81f1ddf393dd09f58a4633a462a24e3d18d42fa8f1abe12a224d6fc236516aa1"
+
+def test_key_order_does_not_change_checksum():
+    assert compute_checksum({"b": 2, "a": 1}) == compute_checksum({"a": 1, "b": 2})
@@ -0,0 +1,109 @@
+"""
+Tests for the Redis write-behind event buffer.
+
+The database write is replaced by a fake that fails on chosen items, so
+these cover how items move between the buffer, processing and dead-letter
+lists.
+"""
+
+import fakeredis
+import orjson
+import pytest
+
+from app.services import events
+from app.services.events import (
+    EVENTS_ATTEMPTS_KEY,
+    EVENTS_BUFFER_KEY,
+    EVENTS_DEADLETTER_KEY,
+    EVENTS_FLUSH_MAX_ATTEMPTS,
+    EVENTS_PROCESSING_KEY,
+    EVENTS_WORKER_ALIVE_KEY,
+    EVENTS_WORKERS_KEY,
+    flush_events_buffer,
+    recover_orphaned_events,
+)
+
+def _item(name: str) -> str:
+    return orjson.dumps({"type": name}).decode()
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+@pytest.fixture
+def written(monkeypatch):
+    """Record committed items; a batch containing a "bad" item fails as a whole."""
+    committed = []
+
+    async def write_event_items(engine, items):
+        if any(orjson.loads(item)["type"] == "bad" for item in items):
+            raise ValueError("invalid event row")
+        committed.extend(orjson.loads(item)["type"] for item in items)
+
+    monkeypatch.setattr(events, "_write_event_items", write_event_items)
+    return committed
+
+async def _buffer(redis, *names: str) -> None:
+    for name in names:
+        await redis.lpush(EVENTS_BUFFER_KEY, _item(name))
+
+@pytest.mark.asyncio
+async def test_flush_writes_oldest_first_and_clears_processing_list(redis, written):
+    await _buffer(redis, "a", "b", "c")
+
+    assert await flush_events_buffer(redis, None, "w1") == 3
+    assert written == ["a", "b", "c"]
+    assert await redis.exists(EVENTS_BUFFER_KEY, EVENTS_PROCESSING_KEY.format("w1")) == 0
+
+@pytest.mark.asyncio
+async def test_failing_batch_is_retried_then_split(redis, written):
+    await _buffer(redis, "a", "bad", "b", "c")
+    processing_key = EVENTS_PROCESSING_KEY.format("w1")
+
+    # Failed attempts keep the batch in the processing list for a retry
+    for attempt in range(1, EVENTS_FLUSH_MAX_ATTEMPTS):
+        with pytest.raises(ValueError):
+            await flush_events_buffer(redis, None, "w1")
+        assert await redis.llen(processing_key) == 4
+        assert int(await redis.get(EVENTS_ATTEMPTS_KEY.format("w1"))) == attempt
+    assert written == []
+
+    # The last attempt splits the batch and dead-letters only the bad row
+    assert await flush_events_buffer(redis, None, "w1") == 3
+    assert sorted(written) == ["a", "b", "c"]
+    assert await redis.lrange(EVENTS_DEADLETTER_KEY, 0, -1) == [_item("bad")]
+    assert await redis.exists(processing_key, EVENTS_ATTEMPTS_KEY.format("w1")) == 0
+
+@pytest.mark.asyncio
+async def test_split_leaves_rows_in_place_on_database_errors(redis, monkeypatch):
+    await _buffer(redis, "a", "b")
+    await redis.set(EVENTS_ATTEMPTS_KEY.format("w1"), EVENTS_FLUSH_MAX_ATTEMPTS - 1)
+
+    async def write_event_items(engine, items):
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(events, "_write_event_items", write_event_items)
+
+    with pytest.raises(ConnectionError):
+        await flush_events_buffer(redis, None, "w1")
+    assert await redis.llen(EVENTS_PROCESSING_KEY.format("w1")) == 2
+    assert await redis.llen(EVENTS_DEADLETTER_KEY) == 0
+
+@pytest.mark.asyncio
+async def test_orphaned_batch_returns_to_the_buffer_in_order(redis, written):
+    # w1 is alive; w2 stopped while holding a batch
+    await _buffer(redis, "a", "b", "c")
+    async with redis.pipeline(transaction=False) as pipe:
+        for _ in range(3):
+            pipe.lmove(EVENTS_BUFFER_KEY, EVENTS_PROCESSING_KEY.format("w2"), "RIGHT", "LEFT")
+        await pipe.execute()
+    await redis.lpush(EVENTS_PROCESSING_KEY.format("w1"), _item("held"))
+    await redis.set(EVENTS_WORKER_ALIVE_KEY.format("w1"), 1)
+    await redis.sadd(EVENTS_WORKERS_KEY, "w1", "w2")
+
+    assert await recover_orphaned_events(redis) == 3
+    assert await redis.smembers(EVENTS_WORKERS_KEY) == {"w1"}
+    assert await redis.lrange(EVENTS_PROCESSING_KEY.format("w1"), 0, -1) == [_item("held")]
+
+    assert await flush_events_buffer(redis, None, "w3") == 3
+    assert written == ["a", "b", "c"]
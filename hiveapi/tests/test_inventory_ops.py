@@ -0,0 +1,147 @@
+"""
+Tests for the inventory path helpers, apply_ops and detect_conflicts.
+
+The path helpers copy only the dicts along the path they change, so these
+check that neither the input inventory nor an op's item is modified.
+"""
+
+import copy
+
+from app.services.inventory import (
+    _pop_path_value,
+    apply_ops,
+    delete_path_value,
+    detect_conflicts,
+    set_path_value,
+)
+
+def _inventory():
+    return {
+        "backpack": {"apple": {"qty": 1}, "pouch": {"nail": {"qty": 10}}},
+        "hands": {},
+        "vest": {"items": [{"id": "a1"}, {"id": "b2"}]},
+    }
+
+def test_set_path_value_copies_only_the_path():
+    data = _inventory()
+    snapshot = copy.deepcopy(data)
+
+    result = set_path_value(data, "backpack.pouch.screw", {"qty": 5})
+
+    assert data == snapshot
+    assert result["backpack"]["pouch"] == {"nail": {"qty": 10}, "screw": {"qty": 5}}
+    assert result["vest"] is data["vest"]
+    assert result["backpack"]["apple"] is data["backpack"]["apple"]
+
+def test_set_path_value_creates_missing_parents():
+    data = _inventory()
+    snapshot = copy.deepcopy(data)
+
+    result = set_path_value(data, "car.trunk.fuel", {"qty": 1})
+
+    assert data == snapshot
+    assert result["car"] == {"trunk": {"fuel": {"qty": 1}}}
+
+def test_delete_path_value_leaves_input_unchanged():
+    data = _inventory()
+    snapshot = copy.deepcopy(data)
+
+    result = delete_path_value(data, "backpack.pouch.nail")
+
+    assert data == snapshot
+    assert result["backpack"]["pouch"] == {}
+    assert result["backpack"]["apple"] is data["backpack"]["apple"]
+
+def test_delete_path_value_missing_path_is_a_no_op():
+    data = _inventory()
+
+    assert delete_path_value(data, "car.trunk.fuel") is data
+    assert delete_path_value(data, "backpack.missing") == data
+
+def test_pop_path_value_returns_value_without_modifying_input():
+    data = _inventory()
+    snapshot = copy.deepcopy(data)
+
+    result, value = _pop_path_value(data, "backpack.pouch.nail")
+
+    assert data == snapshot
+    assert value == {"qty": 10}
+    assert result["backpack"]["pouch"] == {}
+
+def test_pop_path_value_missing_path_returns_input():
+    data = _inventory()
+
+    assert _pop_path_value(data, "backpack.missing") == (data, None)
+    assert _pop_path_value(data, "vest.items.a1") == (data, None)
+
+def test_apply_ops_never_modifies_inventory_or_items():
+    data = _inventory()
+    pear = {"qty": 2}
+    ops = [
+        {"op": "add", "path": "backpack.pear", "item": pear},
+        {"op": "update", "path": "backpack.pear", "item": {"qty": 3}},
+        {"op": "add", "path": "backpack.pear.tags", "item": {"fresh": True}},
+        {"op": "move", "path": "hands.pear", "item": {"from_path": "backpack.pear"}},
+        {"op": "remove", "path": "backpack.apple", "item": {}},
+        {"op": "remove", "path": "vest.items.a1", "item": {"id": "a1"}},
+    ]
+    data_snapshot, ops_snapshot = copy.deepcopy(data), copy.deepcopy(ops)
+
+    result = apply_ops(data, ops)
+
+    assert data == data_snapshot
+    assert ops == ops_snapshot
+    assert pear == {"qty": 2}
+    assert result == {
+        "backpack": {"pouch": {"nail": {"qty": 10}}},
+        "hands": {"pear": {"qty": 3, "tags": {"fresh": True}}},
+        "vest": {"items": [{"id": "b2"}]},
+    }
+
+def test_apply_ops_later_op_does_not_modify_an_earlier_item():
+    data = _inventory()
+    box = {"nails": {"qty": 1}}
+
+    result = apply_ops(data, [
+        {"op": "add", "path": "hands.box", "item": box},
+        {"op": "add", "path": "hands.box.nails.extra", "item": {"qty": 2}},
+        {"op": "remove", "path": "hands.box.nails.qty", "item": {}},
+    ])
+
+    assert box == {"nails": {"qty": 1}}
+    assert result["hands"]["box"] == {"nails": {"extra": {"qty": 2}}}
+
+def test_move_to_existing_dict_merges_item():
+    result = apply_ops(_inventory(), [
+        {"op": "move", "path": "backpack.pouch", "item": {"from_path": "backpack.apple"}},
+    ])
+
+    assert result["backpack"] == {"pouch": {"nail": {"qty": 10}, "qty": 1}}
+
+def test_move_and_remove_of_missing_paths_are_no_ops():
+    data = _inventory()
+
+    result = apply_ops(data, [
+        {"op": "move", "path": "hands.pear", "item": {"from_path": "backpack.pear"}},
+        {"op": "move", "path": "hands.pear", "item": {}},
+        {"op": "remove", "path": "car.trunk", "item": {}},
+        {"op": "remove", "path": "vest.items.z9", "item": {"id": "z9"}},
+    ])
+
+    assert result == data
+
+def test_detect_conflicts_reports_removed_keys():
+    old = _inventory()
+    new = delete_path_value(old, "backpack.pouch.nail")
+
+    assert detect_conflicts(old, new)
+    assert not detect_conflicts(new, old)
+
+def test_detect_conflicts_trusts_matching_checksums():
+    old = _inventory()
+    new = delete_path_value(old, "backpack.apple")
+
+    # Equal checksums return before the slots are compared
+    assert not detect_conflicts(old, new, old_checksum="abc", new_checksum="abc")
+    assert detect_conflicts(old, new, old_checksum="abc", new_checksum="def")
+    assert detect_conflicts(old, new, old_checksum=None, new_checksum=None)
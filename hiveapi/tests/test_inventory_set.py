@@ -0,0 +1,90 @@
+"""
+Tests for the unchanged-inventory short-circuit in /inventory/set.
+
+The handler is called directly with a minimal stand-in for the session,
+so these check which requests write the row without a database.
+"""
+
+import uuid
+
+import pytest
+
+from app.db.models import Character
+from app.routers.inventory import SetInventoryRequest, set_inventory
+from app.utils.checksums import compute_inventory_checksum
+
+STORED_SLOTS = {"a": {"item": "apple", "qty": 1}}
+
+class FakeSession:
+    """Serves one character and counts what the handler writes."""
+
+    def __init__(self, character):
+        self.character = character
+        self.added = []
+        self.commits = 0
+
+    async def get(self, model, ident, **kwargs):
+        return self.character
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+@pytest.fixture
+def server_id():
+    return uuid.uuid4()
+
+@pytest.fixture
+def db(server_id):
+    return FakeSession(Character(
+        id=uuid.uuid4(),
+        owned_by_server=server_id,
+        inventory_json=STORED_SLOTS,
+        inventory_checksum=compute_inventory_checksum(STORED_SLOTS),
+    ))
+
+async def _set(db, server_id, slots, client_checksum=None):
+    request = SetInventoryRequest(
+        character_id=db.character.id,
+        server_id=server_id,
+        slots=slots,
+        client_checksum=client_checksum,
+    )
+    return await set_inventory(request, db=db, server_id=str(server_id))
+
+@pytest.mark.asyncio
+async def test_resent_inventory_is_not_written(db, server_id):
+    stored_checksum = db.character.inventory_checksum
+
+    response = await _set(db, server_id, STORED_SLOTS, client_checksum=stored_checksum)
+
+    assert response.checksum == stored_checksum
+    assert not response.conflict
+    assert db.commits == 0 and db.added == []
+
+@pytest.mark.asyncio
+async def test_changed_slots_with_stored_checksum_are_a_conflict(db, server_id):
+    stored_checksum = db.character.inventory_checksum
+    slots = {"a": {"item": "apple", "qty": 2}}
+
+    response = await _set(db, server_id, slots, client_checksum=stored_checksum)
+
+    assert response.conflict
+    assert response.checksum == compute_inventory_checksum(slots)
+    assert db.character.inventory_checksum == stored_checksum
+    assert db.commits == 0
+
+@pytest.mark.asyncio
+async def test_changed_slots_are_written(db, server_id):
+    slots = {"a": {"item": "apple", "qty": 2}}
+
+    response = await _set(db, server_id, slots, client_checksum=compute_inventory_checksum(slots))
+
+    assert not response.conflict
+    assert db.character.inventory_checksum == response.checksum == compute_inventory_checksum(slots)
+    assert db.commits == 1 and len(db.added) == 1
@@ -0,0 +1,35 @@
+"""
+Tests for the JSON(B) column codec the engines are created with.
+
+Inventory checksums are recomputed from decoded column values, so values
+orjson cannot represent exactly must survive a store and load unchanged.
+"""
+
+from app.deps import json_dumps, json_loads
+from app.utils.checksums import compute_inventory_checksum
+
+def test_json_loads_keeps_20_digit_integers_exact():
+    assert json_loads(b'{"count":99999999999999999999,"neg":-99999999999999999999}') == {
+        "count": 99999999999999999999,
+        "neg": -99999999999999999999,
+    }
+
+def test_json_loads_accepts_text():
+    assert json_loads('{"count":99999999999999999999}') == {"count": 99999999999999999999}
+
+def test_json_loads_decodes_ordinary_documents():
+    assert json_loads(b'{"a":[1,2.5,"x",null],"b":{"c":true}}') == {"a": [1, 2.5, "x", None], "b": {"c": True}}
+
+def test_json_dumps_writes_wide_integers_in_full():
+    assert json_dumps({"count": 2**70}) == b'{"count":1180591620717411303424}'
+
+def test_json_dumps_writes_non_string_keys_as_strings():
+    assert json_loads(json_dumps({1: "a", None: "b"})) == {"1": "a", "null": "b"}
+
+def test_wide_integer_inventory_round_trips_with_its_checksum():
+    slots = {"a": {"item": "ammo", "serial": 2**70, "qty": -2**64}}
+
+    decoded = json_loads(json_dumps(slots))
+
+    assert decoded == slots
+    assert compute_inventory_checksum(decoded) == compute_inventory_checksum(slots)